@@ -0,0 +1,59 @@
+import secrets
+from fastapi import APIRouter, Depends, HTTPException, status, Header, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import Annotated, Literal
+
+from ..core.config import get_settings
+from ..services import export_service
+
+# === Autenticación de Administración ===
+def require_admin(
+    admin_token: Annotated[str | None, Header(alias="X-Admin-Token")] = None
+) -> None:
+    """Valida la cabecera X-Admin-Token contra ADMIN_TOKEN (403 si no coincide o no está configurado)."""
+    settings = get_settings()
+    if not settings.ADMIN_TOKEN or not admin_token or not secrets.compare_digest(
+        admin_token.encode("utf-8"), settings.ADMIN_TOKEN.encode("utf-8")
+    ):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acceso de administración denegado.")
+
+# ================================================
+
+router = APIRouter(tags=["Administración"], dependencies=[Depends(require_admin)])
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "tar": "application/x-tar",
+}
+
+# ----------------- Endpoint para Exportar todas las Extensiones -----------------
+@router.get("/extensions/export")
+def export_extensions_endpoint(formato: Literal["ndjson", "tar"] = "ndjson"):
+    """
+    Exporta TODAS las extensiones en streaming (memoria constante):
+    NDJSON (una por línea) o un tar con un ZIP por extensión.
+    """
+    return StreamingResponse(
+        export_service.iter_export(formato),
+        media_type=MEDIA_TYPES[formato],
+        headers={"Content-Disposition": f'attachment; filename="extensiones.{formato}"'},
+    )
+
+# ----------------- Endpoint para Importar Extensiones -----------------
+@router.post("/extensions/import")
+async def import_extensions_endpoint(
+    archivo: Annotated[UploadFile, File()],
+    formato: Literal["ndjson", "tar"] = "ndjson",
+):
+    """
+    Restaura extensiones desde una exportación, insertándolas en bloque por lotes.
+    Las que ya existen se omiten, así que una importación interrumpida se reanuda repitiéndola.
+    """
+    try:
+        # El archivo subido ya está en disco (SpooledTemporaryFile): se lee en flujo
+        insertadas, omitidas = await run_in_threadpool(export_service.import_file, archivo.file, formato)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return {"message": "Importación completada.", "insertadas": insertadas, "omitidas": omitidas}
@@ -4,21 +4,29 @@ from fastapi import (
     HTTPException, 
     status, 
     Header, 
-    BackgroundTasks, 
     UploadFile,      
     File,            
     Form,
+    Query,
     Cookie           # Para inyectar cookies
 )
 from sqlalchemy.orm import Session
-from typing import List, Annotated, Optional
+from typing import List, Annotated, Optional, Literal
 from datetime import datetime
 
 from ..core.db_setup import get_db
-from ..crud import crud_extension
-from ..models.extension_models import ExtensionCreate, ExtensionPublic
+from ..crud import crud_extension, crud_feedback
+from ..models.extension_models import (
+    ExtensionCreate,
+    ExtensionPublic,
+    ExtensionSearchPage,
+    FeedbackCreate,
+    FeedbackPublic,
+    ResumenFuncionalidadPublic,
+)
 from ..models.user_models import DeviceSession 
-from ..services import extension_service 
+from ..services import extension_service, search_service
+from ..services.generation_scheduler import scheduler
 
 # === Función de Autenticación (ACTUALIZADA para usar Cookie y DB) ===
 def get_current_user_id(
@@ -71,14 +79,17 @@ async def create_extension_endpoint(
     # Archivo ZIP opcional (UploadFile | None)
     zip_file: Annotated[UploadFile | None, File()] = None, 
     
+    # Clase de prioridad de la generación
+    prioridad: Annotated[Literal["interactiva", "lote", "regeneracion"], Form()] = "interactiva",
+    
     # Dependencias de FastAPI
-    background_tasks: BackgroundTasks = BackgroundTasks(),
     user_id: str = Depends(get_current_user_id), 
     db: Session = Depends(get_db)
 ):
     """
     Crea una nueva extensión. Acepta el prompt y un archivo ZIP opcional 
-    con código de referencia. La generación de la IA se ejecuta en segundo plano.
+    con código de referencia. La generación de la IA se encola en segundo plano
+    según su prioridad y puede cancelarse con DELETE /{extension_id}/generation.
     """
     
     # Leer los bytes del archivo subido (debe ser ASÍNCRONO)
@@ -97,10 +108,11 @@ async def create_extension_endpoint(
     extension_data = ExtensionCreate(nombre=nombre, prompt_original=prompt_original)
     db_extension = crud_extension.create_extension(db, user_id, extension_data)
     
-    # Programar la tarea de fondo para la generación de código
-    background_tasks.add_task(
-        extension_service.process_and_save_extension,
+    # Encolar la tarea de fondo para la generación de código
+    scheduler.submit(
         extension_id=db_extension.id_extension,
+        user_id=user_id,
+        prioridad=prioridad,
         prompt=prompt_original,
         funcionalidades=funcionalidades,
         identificadores=identificadores,
@@ -123,6 +135,35 @@ def get_user_extensions_endpoint(
     extensions = crud_extension.get_all_user_extensions(db, user_id, skip=skip, limit=limit)
     return extensions
 
+# ----------------- Endpoint para Buscar Extensiones de la Comunidad -----------------
+@router.get("/search", response_model=ExtensionSearchPage)
+def search_extensions_endpoint(
+    q: Annotated[str, Query(min_length=1, max_length=200)],
+    cursor: Optional[str] = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    db: Session = Depends(get_db)
+):
+    """
+    Busca extensiones ya generadas (de cualquier usuario) por nombre, prompt y código,
+    para reutilizarlas en lugar de generar una nueva. Usa 'siguiente_cursor' para paginar.
+    """
+    
+    try:
+        return search_service.search_extensions(db, q, cursor=cursor, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+# ----------------- Endpoint para las Funcionalidades con más Fallos -----------------
+@router.get("/feedback/mas-fallidas", response_model=List[ResumenFuncionalidadPublic])
+def get_most_failing_functionalities_endpoint(
+    db: Session = Depends(get_db),
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    min_reportes: Annotated[int, Query(ge=1)] = 1
+):
+    """Lista las funcionalidades con mayor tasa de fallos de toda la plataforma."""
+    
+    return crud_feedback.get_most_failing_functionalities(db, limit=limit, min_reportes=min_reportes)
+
 # ----------------- Endpoint para Obtener una Extensión por ID -----------------
 @router.get("/{extension_id}", response_model=ExtensionPublic)
 def get_extension_detail_endpoint(
@@ -137,4 +178,59 @@ def get_extension_detail_endpoint(
     if db_extension is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Extensión no encontrada o acceso denegado.")
         
-    return db_extension
\ No newline at end of file
+    return db_extension
+
+# ----------------- Endpoint para Enviar Feedback de una Funcionalidad -----------------
+@router.post("/{extension_id}/feedback", response_model=FeedbackPublic, status_code=status.HTTP_201_CREATED)
+def create_feedback_endpoint(
+    extension_id: str,
+    feedback_in: FeedbackCreate,
+    user_id: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """Registra una valoración o un reporte de fallo sobre una funcionalidad de la extensión."""
+    
+    if crud_extension.get_extension_by_id(db, extension_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Extensión no encontrada.")
+        
+    return crud_feedback.create_feedback(db, user_id, extension_id, feedback_in)
+
+# ----------------- Endpoint para el Resumen de Feedback de una Extensión -----------------
+@router.get("/{extension_id}/feedback/resumen", response_model=List[ResumenFuncionalidadPublic])
+def get_feedback_summary_endpoint(
+    extension_id: str,
+    db: Session = Depends(get_db)
+):
+    """Obtiene los agregados de feedback de cada funcionalidad de la extensión."""
+    
+    if crud_extension.get_extension_by_id(db, extension_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Extensión no encontrada.")
+        
+    return crud_feedback.get_extension_summary(db, extension_id)
+
+# ----------------- Endpoint para Cancelar la Generación de una Extensión -----------------
+@router.delete("/{extension_id}/generation", status_code=status.HTTP_202_ACCEPTED)
+def cancel_generation_endpoint(
+    extension_id: str,
+    user_id: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """
+    Cancela la generación de una extensión del usuario. La cancelación se registra en la DB
+    (solo si aún no tiene código), así que vale desde cualquier worker: el que ejecute la
+    generación no guardará su resultado. Si la tarea está en este proceso, además se
+    retira de la cola o se detiene sin esperar a la IA.
+    """
+    
+    db_extension = crud_extension.get_user_extension_by_id(db, user_id, extension_id)
+    
+    if db_extension is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Extensión no encontrada o acceso denegado.")
+        
+    if not crud_extension.update_generated_code_if_pending(db, extension_id, extension_service.CANCELLED_CODE):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="La generación ya terminó o no está en curso.")
+        
+    # Solo detiene antes la tarea si la tiene este proceso (None si la tiene otro worker)
+    estado = scheduler.cancel(extension_id)
+    
+    return {"message": "Generación cancelada.", "estado": estado}
\ No newline at end of file
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, Response, HTTPException
 from sqlalchemy.orm import Session
+from ..core.config import get_settings
 from ..core.db_setup import get_db
 from ..crud import crud_user # Importa las funciones de lógica
-from ..models.user_models import SessionCreate, UserPublic
+from ..models.user_models import SessionCreate, UserPublic, SessionDetails
 
 router = APIRouter()
 
@@ -24,7 +25,7 @@ def create_session_and_user(
         key="session_token",
         value=token,
         httponly=True,        # No accesible por JS (seguridad)
-        max_age=31536000,     # Persistente por un año
+        max_age=get_settings().SESSION_IDLE_DAYS * 86400, # Tanto como tarda en caducar la sesión
         samesite="Lax"        # Configuración de seguridad
     )
     
@@ -47,6 +48,43 @@ def revoke_device_session(
     raise HTTPException(status_code=404, detail="Token de sesión no encontrado o ya inactivo.")
 
 
+# ----------------- Endpoints Masivos de Sesiones -----------------
+
+@router.get("/sessions", response_model=list[SessionDetails])
+def list_user_sessions(
+    token: str,
+    incluir_revocadas: bool = False,
+    db: Session = Depends(get_db)
+):
+    """Lista todas las sesiones (dispositivos) del usuario dueño del token."""
+    
+    user = crud_user.get_user_by_token(db, token)
+    
+    if user is None:
+        raise HTTPException(status_code=401, detail="Token no válido o inactivo. Acceso denegado.")
+    
+    return crud_user.get_user_sessions(db, user.id_usuario, solo_activas=not incluir_revocadas)
+
+
+@router.post("/sessions/revoke-all")
+def revoke_all_user_sessions(
+    token: str,
+    conservar_actual: bool = True,
+    db: Session = Depends(get_db)
+):
+    """Revoca todas las sesiones del usuario en una sola sentencia (opcionalmente salvo la actual)."""
+    
+    user = crud_user.get_user_by_token(db, token)
+    
+    if user is None:
+        raise HTTPException(status_code=401, detail="Token no válido o inactivo. Acceso denegado.")
+    
+    revocadas = crud_user.revoke_all_user_sessions(
+        db, user.id_usuario, excepto_token=token if conservar_actual else None
+    )
+    return {"message": "Sesiones revocadas exitosamente.", "revocadas": revocadas}
+
+
 # ----------------- Endpoint para Obtener Usuario (Verificación del Token) -----------------
 
 @router.get("/me", response_model=UserPublic)
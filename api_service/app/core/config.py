@@ -1,5 +1,6 @@
+from functools import lru_cache
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List
+from typing import Any, Dict, List, Optional
 
 class Settings(BaseSettings):
     """
@@ -18,9 +19,39 @@ class Settings(BaseSettings):
     # 🔒 Seguridad y Tokens
     # Clave secreta fuerte y única, esencial para firmar cookies y JWT (si los usas).
     SECRET_KEY: str 
+    # Token para los endpoints de administración (cabecera X-Admin-Token).
+    # Si no se define, los endpoints de administración quedan deshabilitados.
+    ADMIN_TOKEN: Optional[str] = None
     
     # Variables de la IA
-    GEMINI_API_KEY: str
+    # Backend de generación: 'gemini' (API real) o 'simulador' (local, sin red ni cuota).
+    LLM_BACKEND: str = "gemini"
+    GEMINI_API_KEY: Optional[str] = None # Obligatoria con LLM_BACKEND='gemini'
+    GEMINI_MODEL: str = "gemini-2.5-flash"
+    # Parámetros del simulador (JSON con los campos de llm_simulator.SimulatorConfig)
+    LLM_SIMULATOR: Dict[str, Any] = {}
+    # Hilos que ejecutan generaciones en paralelo (por proceso/worker)
+    GENERATION_WORKERS: int = 4
+
+    # 🚀 Arranque
+    # Si es False, el arranque no toca el esquema de la DB (se asume migrado externamente).
+    DB_SCHEMA_CHECK: bool = True
+    # Imprime un informe con la duración de cada fase del arranque.
+    STARTUP_PROFILE: bool = False
+
+    # 🔑 Sesiones de dispositivo
+    # Días sin actividad tras los que una sesión se considera caducada y se elimina.
+    # También es la vida de la cookie 'session_token': mientras el navegador la conserve,
+    # la sesión sigue existiendo en la DB.
+    SESSION_IDLE_DAYS: int = 365
+    # Cada cuántos segundos se ejecuta el barrido de sesiones caducadas (0 = deshabilitado).
+    SESSION_SWEEP_INTERVAL_SECONDS: int = 3600
+    # Filas eliminadas por sentencia DELETE durante el barrido.
+    SESSION_SWEEP_BATCH_SIZE: int = 1000
+
+    # 📦 Exportación/Importación masiva
+    # Filas por lote al leer con cursor del servidor y al insertar en bloque.
+    EXPORT_BATCH_SIZE: int = 1000
 
     # 🌐 Configuración de CORS/UI
     # Lista de orígenes permitidos (donde corre el frontend Streamlit/Taipy)
@@ -35,5 +66,8 @@ class Settings(BaseSettings):
         extra='ignore'        # Ignora variables en el .env que no estén definidas aquí
     )
 
-# Instancia Global
-settings = Settings()
\ No newline at end of file
+@lru_cache
+def get_settings() -> Settings:
+    """Construye (una sola vez) y retorna la configuración de la aplicación."""
+    return Settings()
+
@@ -1,41 +1,156 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from typing import Generator
-from .config import settings 
+import hashlib
+import time
+from functools import lru_cache
+from sqlalchemy import create_engine, inspect, MetaData, Table, Column, String, select, delete, insert, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.schema import CreateTable, CreateIndex
+from typing import Generator, List
+from .config import get_settings 
 from .db_base import Base 
 
-SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
+@lru_cache
+def get_engine() -> Engine:
+    """Crea (una sola vez, en el primer uso) el motor de la DB configurada en DATABASE_URL."""
+    return create_engine(
+        get_settings().DATABASE_URL, 
+        pool_pre_ping=True
+    )
 
-# Creación del Motor (Engine)
-ENGINE = create_engine(
-    SQLALCHEMY_DATABASE_URL, 
-    pool_pre_ping=True
+# Fábrica de Sesiones: el motor se enlaza al crear cada sesión, no al importar el módulo
+_session_factory = sessionmaker(
+    autocommit=False, 
+    autoflush=False
 )
 
-# Fábrica de Sesiones (SessionLocal)
-SessionLocal = sessionmaker(
-    autocommit=False, 
-    autoflush=False,   
-    bind=ENGINE        
+def SessionLocal() -> Session:
+    """Crea una sesión de DB enlazada al motor de la aplicación."""
+    return _session_factory(bind=get_engine())
+
+# Tabla de control (fuera de Base.metadata): guarda la huella del esquema ya aplicado.
+_schema_metadata = MetaData()
+esquema_version = Table(
+    "esquema_version",
+    _schema_metadata,
+    Column("huella", String(64), primary_key=True),
 )
 
+# Clave del bloqueo consultivo de PostgreSQL que serializa la creación del esquema
+# entre workers que arrancan a la vez (p. ej. tras un despliegue o al autoescalar)
+SCHEMA_LOCK_KEY = 0x0CEBA1
+SCHEMA_APPLY_ATTEMPTS = 5
+
+
+class SchemaMismatchError(RuntimeError):
+    """Las tablas existentes no coinciden con los modelos y create_all no puede corregirlo."""
+
 # --- Funciones de Orquestación ---
 
+def schema_fingerprint() -> str:
+    """
+    Calcula una huella (SHA-256) del DDL de todos los modelos ORM para el dialecto actual.
+    Cambia cuando se añade o modifica una tabla, columna o índice.
+    """
+    from ..models import user_models, extension_models
+
+    dialect = get_engine().dialect
+    h = hashlib.sha256()
+    for table in Base.metadata.sorted_tables:
+        h.update(str(CreateTable(table).compile(dialect=dialect)).encode("utf-8"))
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            h.update(str(CreateIndex(index).compile(dialect=dialect)).encode("utf-8"))
+    return h.hexdigest()
+
 def init_db_tables():
     """
-    Crea las tablas en la DB si no existen.
+    Asegura que el esquema de la DB corresponde con los modelos.
     Esta función es llamada por @app.on_event("startup") en main.py.
+
+    En el caso normal (esquema ya aplicado) solo cuesta una consulta: se compara la
+    huella guardada en 'esquema_version' con la de los modelos. Solo si difieren se
+    ejecuta Base.metadata.create_all y se registra la nueva huella. Si varios workers
+    arrancan a la vez, en PostgreSQL solo uno lo hace (bloqueo consultivo).
+
+    create_all solo crea tablas e índices que falten; no añade, modifica ni elimina
+    columnas. Antes de registrar la huella se comparan las columnas de las tablas
+    existentes con las de los modelos y, si difieren, se levanta SchemaMismatchError
+    (sin registrar nada): esa migración hay que aplicarla a mano.
     """
-    from ..models import user_models 
+    if not get_settings().DB_SCHEMA_CHECK:
+        return
+
+    huella = schema_fingerprint()
+
+    if _applied_fingerprint() == huella:
+        return
 
-    print("Verificando y creando tablas de PostgreSQL si es necesario...")
-    # Base.metadata.create_all es un comando IDEMPOTENTE: solo crea las tablas que faltan.
-    Base.metadata.create_all(bind=ENGINE)
+    print("Esquema de DB desactualizado. Creando tablas de PostgreSQL si es necesario...")
+    for intento in range(SCHEMA_APPLY_ATTEMPTS):
+        try:
+            _apply_schema(huella)
+            break
+        except DBAPIError:
+            # Sin bloqueo consultivo (otros dialectos), otro worker pudo estar aplicando el
+            # mismo esquema en paralelo ("already exists"/clave duplicada): se espera a que
+            # termine y se reintenta (create_all omite lo que ya exista).
+            if intento == SCHEMA_APPLY_ATTEMPTS - 1:
+                raise
+            time.sleep(0.5 * (intento + 1))
+            if _applied_fingerprint() == huella:
+                break
     print("Tablas de DB aseguradas.")
 
+def _apply_schema(huella: str) -> None:
+    """Crea tablas e índices que falten y registra la huella, en una sola transacción."""
+    with get_engine().begin() as conn:
+        if conn.dialect.name == "postgresql":
+            # Solo un worker aplica el esquema; el resto espera aquí y luego vuelve a comprobar
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+            # La tabla de control no existe en una DB nueva ni al actualizar desde una versión anterior
+            _schema_metadata.create_all(bind=conn)
+            if conn.execute(select(esquema_version.c.huella)).scalar() == huella:
+                return
+        # Base.metadata.create_all es un comando IDEMPOTENTE: solo crea las tablas que faltan.
+        Base.metadata.create_all(bind=conn)
+        # ...pero no altera las existentes: si sus columnas no coinciden con los modelos, no se registra la huella
+        diferencias = _column_differences(conn)
+        if diferencias:
+            raise SchemaMismatchError(
+                "El esquema de la DB no coincide con los modelos (create_all no altera tablas "
+                "existentes; aplica la migración y reinicia): " + "; ".join(diferencias)
+            )
+        # ...ni añade índices nuevos a tablas ya existentes
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+        _schema_metadata.create_all(bind=conn)
+        conn.execute(delete(esquema_version))
+        conn.execute(insert(esquema_version).values(huella=huella))
+
+def _column_differences(conn: Connection) -> List[str]:
+    """Columnas que faltan en la DB o que los modelos no declaran, tabla por tabla."""
+    inspector = inspect(conn)
+    diferencias = []
+    for table in Base.metadata.sorted_tables:
+        actuales = {c["name"] for c in inspector.get_columns(table.name)}
+        esperadas = {c.name for c in table.columns}
+        diferencias += [f"falta {table.name}.{col}" for col in sorted(esperadas - actuales)]
+        diferencias += [f"sobra {table.name}.{col}" for col in sorted(actuales - esperadas)]
+    return diferencias
+
+def _applied_fingerprint():
+    """Huella registrada en 'esquema_version' (None si la tabla de control aún no existe)."""
+    try:
+        with get_engine().connect() as conn:
+            return conn.execute(select(esquema_version.c.huella)).scalar()
+    except DBAPIError:
+        # La tabla de control aún no existe (DB nueva)
+        return None
+
 # --- Inyección de Dependencia (Función Generadora) ---
 
-def get_db() -> Generator[SessionLocal, None, None]:
+def get_db() -> Generator[Session, None, None]:
     """
     Generador de dependencias para FastAPI.
     Crea una sesión de DB por solicitud y la cierra automáticamente.
@@ -1,71 +1,68 @@
 import asyncio
 import os
-import google.generativeai as genai
-from typing import Optional
-from .config import settings
+import threading
+from typing import Any, Callable, Optional
+from .config import get_settings
+from .llm_backend import LLMBackend
 
-# Configuración del cliente Gemini
-if settings.GEMINI_API_KEY:
-    os.environ["GOOGLE_API_KEY"] = settings.GEMINI_API_KEY
-    genai.configure(api_key=settings.GEMINI_API_KEY)
+# El SDK de Gemini es pesado de importar; el modelo se construye en el primer uso
+# (no al importar el módulo) para que el arranque de los workers sea rápido.
+_model = None
+_model_lock = threading.Lock()
 
-# Seleccionamos el modelo
-model = genai.GenerativeModel("gemini-2.5-flash")
+def get_model():
+    """Configura el SDK de Gemini y retorna el modelo, creándolo la primera vez."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                import google.generativeai as genai
 
-async def generate_extension_code(
-    prompt_principal: str, 
-    funcionalidades: Optional[str] = None, 
-    identificadores: Optional[str] = None, 
-    codigo_referencia: Optional[str] = None
-) -> Optional[str]:
-    """
-    Función asíncrona que llama al modelo de Gemini.
-    Retorna la respuesta de texto con el código estructurado o None.
+                settings = get_settings()
+                # Configuración del cliente Gemini
+                if settings.GEMINI_API_KEY:
+                    os.environ["GOOGLE_API_KEY"] = settings.GEMINI_API_KEY
+                    genai.configure(api_key=settings.GEMINI_API_KEY)
+
+                # Seleccionamos el modelo
+                _model = genai.GenerativeModel(settings.GEMINI_MODEL)
+    return _model
+
+def _run_detached(func: Callable[[], Any]) -> "asyncio.Future[Any]":
     """
-    
-    # Estructuramos el mensaje que se le enviará al modelo (TU LÓGICA)
-    mensaje = f"""
-    Eres un generador de extensiones de Google Chrome. 
-    Debes crear una extensión completamente funcional en base a las siguientes instrucciones.
-    
-    --- Instrucciones ---
-    {prompt_principal.strip()}
-    
-    --- Funcionalidades requeridas ---
-    {funcionalidades if funcionalidades else 'No se especificaron funcionalidades adicionales.'}
-    
-    --- Identificadores o clases relevantes ---
-    {identificadores if identificadores else 'No se especificaron identificadores o clases relevantes.'}
-    
-    --- Código de referencia ---
-    {codigo_referencia if codigo_referencia else 'No se adjuntó código de referencia.'}
-    
-    --- Formato de salida ---
-    Devuelve únicamente el código fuente de la extensión, **sin explicaciones ni texto adicional**,
-    en el siguiente formato exacto (respetar guiones y estructura):
-    
-    --- archivo: manifest.json ---
-    (contenido del archivo)
-    --- fin archivo ---
-    
-    --- archivo: background.js ---
-    (contenido del archivo)
-    --- fin archivo ---
-    
-    --- archivo: popup.html ---
-    (contenido del archivo)
-    --- fin archivo ---
-    
-    Cada archivo debe incluir su contenido completo y funcional.
-    No incluyas texto fuera de estos bloques ni encabezados adicionales.
+    Ejecuta una llamada bloqueante en un hilo daemon propio y retorna un future del loop actual.
+    A diferencia de run_in_executor(None, ...), asyncio.run no espera a este hilo al cerrarse:
+    si se cancela la espera, el llamador queda libre al momento y el resultado se descarta.
     """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def _resolve(resultado: Any, error: Optional[BaseException]) -> None:
+        if future.done(): # Cancelado mientras tanto
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(resultado)
+
+    def _run() -> None:
+        resultado, error = None, None
+        try:
+            resultado = func()
+        except BaseException as e:
+            error = e
+        try:
+            loop.call_soon_threadsafe(_resolve, resultado, error)
+        except RuntimeError:
+            pass # El loop ya se cerró: nadie espera la respuesta
+
+    threading.Thread(target=_run, name="gemini-call", daemon=True).start()
+    return future
+
+class GeminiBackend(LLMBackend):
+    """Backend real: envía el mensaje al modelo de Gemini."""
 
-    try:
-        loop = asyncio.get_event_loop()
-        respuesta = await loop.run_in_executor(None, lambda: model.generate_content(mensaje))
-        
+    async def generate(self, mensaje: str) -> Optional[str]:
+        model = get_model()
+        respuesta = await _run_detached(lambda: model.generate_content(mensaje))
         return respuesta.text
-    
-    except Exception as e:
-        print(f"Error al llamar a la API de Gemini: {e}")
-        return None
\ No newline at end of file
@@ -0,0 +1,109 @@
+import threading
+from abc import ABC, abstractmethod
+from typing import Optional
+from .config import get_settings
+
+
+class LLMBackend(ABC):
+    """
+    Interfaz de los backends de generación (Gemini, simulador, ...).
+    `generate` recibe el mensaje completo y retorna el texto de la respuesta;
+    puede levantar excepciones, que generate_extension_code convierte en None.
+    """
+
+    @abstractmethod
+    async def generate(self, mensaje: str) -> Optional[str]:
+        ...
+
+
+# Backend activo del proceso (se crea en el primer uso según LLM_BACKEND)
+_backend: Optional[LLMBackend] = None
+_backend_lock = threading.Lock()
+
+def get_backend() -> LLMBackend:
+    """Retorna el backend configurado en LLM_BACKEND ('gemini' o 'simulador')."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                settings = get_settings()
+                if settings.LLM_BACKEND == "gemini":
+                    from .gemini_client import GeminiBackend
+                    _backend = GeminiBackend()
+                elif settings.LLM_BACKEND == "simulador":
+                    from .llm_simulator import SimulatedBackend, SimulatorConfig
+                    _backend = SimulatedBackend(SimulatorConfig(**settings.LLM_SIMULATOR))
+                else:
+                    raise ValueError(f"LLM_BACKEND no soportado: {settings.LLM_BACKEND}")
+    return _backend
+
+def set_backend(backend: Optional[LLMBackend]) -> None:
+    """Reemplaza el backend activo (None = volver a crearlo desde la configuración)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+def build_prompt(
+    prompt_principal: str, 
+    funcionalidades: Optional[str] = None, 
+    identificadores: Optional[str] = None, 
+    codigo_referencia: Optional[str] = None
+) -> str:
+    """Construye el mensaje que se le envía al modelo."""
+    
+    # Estructuramos el mensaje que se le enviará al modelo (TU LÓGICA)
+    mensaje = f"""
+    Eres un generador de extensiones de Google Chrome. 
+    Debes crear una extensión completamente funcional en base a las siguientes instrucciones.
+    
+    --- Instrucciones ---
+    {prompt_principal.strip()}
+    
+    --- Funcionalidades requeridas ---
+    {funcionalidades if funcionalidades else 'No se especificaron funcionalidades adicionales.'}
+    
+    --- Identificadores o clases relevantes ---
+    {identificadores if identificadores else 'No se especificaron identificadores o clases relevantes.'}
+    
+    --- Código de referencia ---
+    {codigo_referencia if codigo_referencia else 'No se adjuntó código de referencia.'}
+    
+    --- Formato de salida ---
+    Devuelve únicamente el código fuente de la extensión, **sin explicaciones ni texto adicional**,
+    en el siguiente formato exacto (respetar guiones y estructura):
+    
+    --- archivo: manifest.json ---
+    (contenido del archivo)
+    --- fin archivo ---
+    
+    --- archivo: background.js ---
+    (contenido del archivo)
+    --- fin archivo ---
+    
+    --- archivo: popup.html ---
+    (contenido del archivo)
+    --- fin archivo ---
+    
+    Cada archivo debe incluir su contenido completo y funcional.
+    No incluyas texto fuera de estos bloques ni encabezados adicionales.
+    """
+    return mensaje
+
+async def generate_extension_code(
+    prompt_principal: str, 
+    funcionalidades: Optional[str] = None, 
+    identificadores: Optional[str] = None, 
+    codigo_referencia: Optional[str] = None
+) -> Optional[str]:
+    """
+    Función asíncrona que llama al backend de IA configurado.
+    Retorna la respuesta de texto con el código estructurado o None.
+    """
+    mensaje = build_prompt(prompt_principal, funcionalidades, identificadores, codigo_referencia)
+
+    try:
+        return await get_backend().generate(mensaje)
+    
+    except Exception as e:
+        print(f"Error al llamar a la API de IA: {e}")
+        return None
@@ -0,0 +1,137 @@
+import asyncio
+import itertools
+import json
+import random
+import threading
+from dataclasses import dataclass
+from typing import List, Optional
+
+from .llm_backend import LLMBackend
+
+
+class SimulatedLLMError(Exception):
+    """Error inyectado por el simulador (equivale a un fallo de la API real)."""
+
+
+@dataclass
+class SimulatorConfig:
+    """Parámetros del simulador. Las tasas son probabilidades entre 0 y 1 por llamada."""
+
+    # Semilla: con la misma semilla, la llamada N siempre produce el mismo resultado
+    seed: int = 0
+
+    # Respuestas grabadas (JSONL con {"respuesta": "..."} por línea); si no hay, se sintetizan
+    replay_path: Optional[str] = None
+
+    # Tamaño de las respuestas sintetizadas
+    num_archivos: int = 3
+    bytes_por_archivo: int = 2000
+
+    # Latencia: 'fija', 'uniforme' (0..2*media) o 'lognormal' (mediana = media)
+    latencia: str = "lognormal"
+    latencia_media_ms: float = 800.0
+    latencia_sigma: float = 0.5
+    latencia_max_ms: float = 30000.0
+
+    # Fallos inyectados
+    tasa_error: float = 0.0       # Levanta SimulatedLLMError
+    tasa_vacia: float = 0.0       # Respuesta vacía
+    tasa_truncada: float = 0.0    # Respuesta cortada en un punto aleatorio
+    tasa_malformada: float = 0.0  # Sin los marcadores '--- archivo:' / sin manifest.json
+
+
+# Archivos que se sintetizan después de manifest.json (en este orden)
+_ARCHIVOS_EXTRA = ["background.js", "popup.html", "content.js", "popup.js", "styles.css"]
+
+
+class SimulatedBackend(LLMBackend):
+    """
+    Backend local que imita a Gemini sin red ni cuota: reproduce respuestas grabadas
+    o sintetiza salidas '--- archivo:' bien formadas, inyectando latencia y fallos.
+    Es determinista: el resultado de la llamada N depende solo de (seed, N).
+    """
+
+    def __init__(self, config: Optional[SimulatorConfig] = None):
+        self.config = config or SimulatorConfig()
+        self._contador = itertools.count()
+        self._lock = threading.Lock()
+        self._grabadas: List[str] = self._load_replay(self.config.replay_path)
+
+    @staticmethod
+    def _load_replay(path: Optional[str]) -> List[str]:
+        """Carga las respuestas grabadas (una por línea JSON)."""
+        if not path:
+            return []
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line)["respuesta"] for line in f if line.strip()]
+
+    def _next_rng(self) -> tuple[int, random.Random]:
+        """Generador aleatorio propio de cada llamada (independiente del orden de los hilos)."""
+        with self._lock:
+            n = next(self._contador)
+        return n, random.Random(f"{self.config.seed}:{n}")
+
+    def _latency_seconds(self, rng: random.Random) -> float:
+        """Muestra la latencia de una llamada según la distribución configurada."""
+        c = self.config
+        if c.latencia == "fija":
+            ms = c.latencia_media_ms
+        elif c.latencia == "uniforme":
+            ms = rng.uniform(0, 2 * c.latencia_media_ms)
+        elif c.latencia == "lognormal":
+            ms = c.latencia_media_ms * rng.lognormvariate(0, c.latencia_sigma)
+        else:
+            raise ValueError(f"Distribución de latencia no soportada: {c.latencia}")
+        return min(ms, c.latencia_max_ms) / 1000
+
+    def _synthesize(self, n: int, rng: random.Random) -> str:
+        """Sintetiza una respuesta en el formato que espera parse_gemini_response."""
+        c = self.config
+        manifest = json.dumps({
+            "manifest_version": 3,
+            "name": f"Extensión simulada {n}",
+            "version": "1.0.0",
+            "background": {"service_worker": "background.js"},
+            "action": {"default_popup": "popup.html"},
+        }, indent=2)
+        bloques = [f"--- archivo: manifest.json ---\n{manifest}\n--- fin archivo ---"]
+
+        for i in range(max(c.num_archivos - 1, 0)):
+            nombre = _ARCHIVOS_EXTRA[i] if i < len(_ARCHIVOS_EXTRA) else f"modulo_{i}.js"
+            lineas = []
+            tamano = 0
+            while tamano < c.bytes_por_archivo:
+                linea = f"// {nombre} linea {len(lineas)} valor {rng.randrange(10**6)}"
+                lineas.append(linea)
+                tamano += len(linea) + 1
+            bloques.append(f"--- archivo: {nombre} ---\n" + "\n".join(lineas) + "\n--- fin archivo ---")
+
+        return "\n\n".join(bloques)
+
+    async def generate(self, mensaje: str) -> Optional[str]:
+        n, rng = self._next_rng()
+        c = self.config
+
+        await asyncio.sleep(self._latency_seconds(rng))
+
+        # Un único sorteo decide el tipo de fallo (las tasas se acumulan)
+        sorteo = rng.random()
+        if sorteo < c.tasa_error:
+            raise SimulatedLLMError(f"Error simulado en la llamada {n}")
+        sorteo -= c.tasa_error
+        if sorteo < c.tasa_vacia:
+            return ""
+        sorteo -= c.tasa_vacia
+
+        if self._grabadas:
+            respuesta = self._grabadas[n % len(self._grabadas)]
+        else:
+            respuesta = self._synthesize(n, rng)
+
+        if sorteo < c.tasa_truncada:
+            return respuesta[:rng.randrange(1, max(len(respuesta), 2))]
+        sorteo -= c.tasa_truncada
+        if sorteo < c.tasa_malformada:
+            return respuesta.replace("--- archivo:", "archivo:").replace("--- fin archivo ---", "")
+
+        return respuesta
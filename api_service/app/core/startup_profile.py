@@ -0,0 +1,24 @@
+import time
+from typing import List, Tuple
+
+# Marca de tiempo del inicio del proceso de importación de la app.
+# main.py importa este módulo en primer lugar para que la medición incluya todo.
+_T0 = time.perf_counter()
+_fases: List[Tuple[str, float]] = []
+
+def mark(fase: str) -> None:
+    """Registra el instante en el que termina una fase del arranque."""
+    _fases.append((fase, time.perf_counter()))
+
+def report() -> str:
+    """
+    Construye el informe del arranque: duración de cada fase y total acumulado,
+    en milisegundos, en el orden en que se registraron.
+    """
+    lineas = ["Perfil de arranque de CEB-AI API:"]
+    anterior = _T0
+    for fase, instante in _fases:
+        lineas.append(f"  {fase:<32} {(instante - anterior) * 1000:8.1f} ms")
+        anterior = instante
+    lineas.append(f"  {'TOTAL':<32} {(anterior - _T0) * 1000:8.1f} ms")
+    return "\n".join(lineas)
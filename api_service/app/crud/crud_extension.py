@@ -1,7 +1,8 @@
+from sqlalchemy import select, insert, update
 from sqlalchemy.orm import Session
 from datetime import datetime
 import uuid 
-from typing import List
+from typing import List, Iterable, Iterator, Dict, Any, Tuple
 from ..models.extension_models import Extension, ExtensionCreate
 from ..models.user_models import User 
 
@@ -29,6 +30,10 @@ def create_extension(db: Session, user_id: str, extension_in: ExtensionCreate) -
     
     return db_extension
 
+def get_extension_by_id(db: Session, extension_id: str) -> Extension | None:
+    """Obtiene una extensión por ID, sin importar su propietario."""
+    return db.query(Extension).filter(Extension.id_extension == extension_id).first()
+
 def get_user_extension_by_id(db: Session, user_id: str, extension_id: str) -> Extension | None:
     """Obtiene una extensión específica por ID, asegurando que pertenezca al usuario."""
     return db.query(Extension).filter(
@@ -46,4 +51,106 @@ def update_generated_code(db: Session, extension: Extension, generated_code: str
     extension.timestamp_actualizacion = datetime.utcnow()
     db.commit()
     db.refresh(extension)
-    return extension
\ No newline at end of file
+    return extension
+
+def update_generated_code_if_pending(db: Session, extension_id: str, generated_code: str) -> bool:
+    """
+    Guarda `generated_code` solo si la extensión aún no tiene código (UPDATE condicional).
+    Retorna False si ya lo tenía: otra escritura (p. ej. una cancelación) llegó antes.
+    """
+    return mark_pending_extensions(db, [extension_id], generated_code) == 1
+
+def mark_pending_extensions(db: Session, extension_ids: List[str], generated_code: str) -> int:
+    """
+    Guarda `generated_code` en las extensiones indicadas que aún no tienen código
+    (un único UPDATE). Retorna cuántas se actualizaron.
+    """
+    if not extension_ids:
+        return 0
+    result = db.execute(
+        update(Extension)
+        .where(Extension.id_extension.in_(extension_ids), Extension.codigo_generado.is_(None))
+        .values(codigo_generado=generated_code, timestamp_actualizacion=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
+
+# ----------------- Funciones Masivas (Exportación/Importación) -----------------
+
+def stream_all_extensions(db: Session, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+    """
+    Recorre TODAS las extensiones con un cursor del lado del servidor.
+    Retorna filas como diccionarios (sin objetos ORM), de `batch_size` en `batch_size`,
+    por lo que la memoria usada no depende del número total de filas.
+    """
+    stmt = (
+        select(Extension.__table__)
+        .order_by(Extension.id_extension)
+        .execution_options(yield_per=batch_size) # Implica stream_results=True
+    )
+    for row in db.execute(stmt).mappings():
+        yield dict(row)
+
+def bulk_insert_extensions(db: Session, rows: Iterable[Dict[str, Any]], batch_size: int = 1000) -> Tuple[int, int]:
+    """
+    Inserta extensiones en bloque (INSERT ... executemany) confirmando cada `batch_size` filas.
+    Las extensiones cuyo id ya existe se omiten, de modo que una importación interrumpida
+    puede reanudarse volviendo a ejecutarla con el mismo archivo.
+    Crea los usuarios propietarios que no existan para respetar la clave foránea.
+    Retorna (insertadas, omitidas).
+    """
+    insertadas = omitidas = 0
+    batch: List[Dict[str, Any]] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            nuevas = _insert_extension_batch(db, batch)
+            insertadas += nuevas
+            omitidas += len(batch) - nuevas
+            batch = []
+    if batch:
+        nuevas = _insert_extension_batch(db, batch)
+        insertadas += nuevas
+        omitidas += len(batch) - nuevas
+    return insertadas, omitidas
+
+def _insert_ignoring_conflicts(db: Session, model, rows: List[Dict[str, Any]]) -> None:
+    """INSERT en bloque que ignora las claves duplicadas (carreras con otra importación)."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(model).on_conflict_do_nothing()
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(model).on_conflict_do_nothing()
+    else:
+        stmt = insert(model)
+    db.execute(stmt, rows)
+
+def _insert_extension_batch(db: Session, batch: List[Dict[str, Any]]) -> int:
+    """
+    Inserta un lote de extensiones (y sus usuarios faltantes) en una sola transacción,
+    omitiendo los ids que ya existen o que se repiten en el lote. Retorna cuántas insertó.
+    """
+    por_id: Dict[str, Dict[str, Any]] = {}
+    for row in batch:
+        por_id.setdefault(row["id_extension"], row)
+    existentes = set(db.scalars(select(Extension.id_extension).where(Extension.id_extension.in_(por_id))))
+    nuevas = [row for id_extension, row in por_id.items() if id_extension not in existentes]
+    if not nuevas:
+        return 0
+
+    user_ids = {row["id_usuario_fk"] for row in nuevas if row.get("id_usuario_fk")}
+    if user_ids:
+        existentes = set(db.scalars(select(User.id_usuario).where(User.id_usuario.in_(user_ids))))
+        faltantes = [
+            {"id_usuario": uid, "nombre_usuario": f"User_{uid[:8]}", "timestamp_creacion": datetime.utcnow()}
+            for uid in user_ids - existentes
+        ]
+        if faltantes:
+            _insert_ignoring_conflicts(db, User, faltantes)
+
+    _insert_ignoring_conflicts(db, Extension, nuevas)
+    db.commit()
+    return len(nuevas)
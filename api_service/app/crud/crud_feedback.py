@@ -0,0 +1,117 @@
+from sqlalchemy import update, case, cast, Float
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from datetime import datetime
+import uuid
+from typing import List
+from ..models.extension_models import FeedbackFuncionalidad, ResumenFuncionalidad, FeedbackCreate
+
+# Peso de la última puntuación en la media móvil exponencial ('puntuacion_reciente')
+TENDENCIA_ALPHA = 0.2
+
+
+# ----------------- Funciones de Feedback -----------------
+
+def create_feedback(db: Session, user_id: str, extension_id: str, feedback_in: FeedbackCreate) -> FeedbackFuncionalidad:
+    """
+    Registra el feedback de una funcionalidad y actualiza su resumen agregado
+    en la misma transacción.
+    """
+    db_feedback = FeedbackFuncionalidad(
+        id_feedback=str(uuid.uuid4()),
+        id_extension_fk=extension_id,
+        id_usuario_fk=user_id,
+        funcionalidad=feedback_in.funcionalidad,
+        puntuacion=feedback_in.puntuacion,
+        es_fallo=feedback_in.es_fallo,
+        descripcion_fallo=feedback_in.descripcion_fallo,
+        timestamp_creacion=datetime.utcnow(),
+    )
+    db.add(db_feedback)
+    # Se escribe ya, FUERA del SAVEPOINT de _ensure_summary_row: así un error propio de
+    # esta fila (p. ej. una clave foránea) no se confunde con la carrera del resumen
+    db.flush()
+
+    _apply_to_summary(db, extension_id, feedback_in)
+
+    db.commit()
+    db.refresh(db_feedback)
+    return db_feedback
+
+def _ensure_summary_row(db: Session, extension_id: str, funcionalidad: str) -> None:
+    """Crea la fila de resumen (con contadores a cero) si todavía no existe."""
+    if db.get(ResumenFuncionalidad, (extension_id, funcionalidad)) is not None:
+        return
+    try:
+        # SAVEPOINT: si otra solicitud la creó en paralelo, solo se descarta este INSERT
+        with db.begin_nested():
+            db.add(ResumenFuncionalidad(
+                id_extension_fk=extension_id,
+                funcionalidad=funcionalidad,
+                total_reportes=0,
+                total_valoraciones=0,
+                suma_puntuaciones=0,
+                total_fallos=0,
+                tasa_fallos=0.0,
+            ))
+    except IntegrityError:
+        pass
+
+def _apply_to_summary(db: Session, extension_id: str, feedback_in: FeedbackCreate) -> None:
+    """
+    Actualiza los agregados con un único UPDATE relativo (contador = contador + 1),
+    de modo que solicitudes concurrentes no pierdan incrementos.
+    """
+    _ensure_summary_row(db, extension_id, feedback_in.funcionalidad)
+
+    R = ResumenFuncionalidad
+    fallo = 1 if feedback_in.es_fallo else 0
+    valores = {
+        R.total_reportes: R.total_reportes + 1,
+        R.total_fallos: R.total_fallos + fallo,
+        # Las expresiones del SET leen los valores previos a este UPDATE
+        R.tasa_fallos: cast(R.total_fallos + fallo, Float) / (R.total_reportes + 1),
+        R.timestamp_ultimo_feedback: datetime.utcnow(),
+    }
+
+    p = feedback_in.puntuacion
+    if p is not None:
+        valores[R.total_valoraciones] = R.total_valoraciones + 1
+        valores[R.suma_puntuaciones] = R.suma_puntuaciones + p
+        valores[R.puntuacion_media] = cast(R.suma_puntuaciones + p, Float) / (R.total_valoraciones + 1)
+        valores[R.puntuacion_reciente] = case(
+            (R.puntuacion_reciente.is_(None), float(p)),
+            else_=R.puntuacion_reciente * (1 - TENDENCIA_ALPHA) + p * TENDENCIA_ALPHA,
+        )
+
+    db.execute(
+        update(R)
+        .where(R.id_extension_fk == extension_id, R.funcionalidad == feedback_in.funcionalidad)
+        .values(valores)
+        .execution_options(synchronize_session=False)
+    )
+
+
+# ----------------- Consultas sobre el Resumen -----------------
+
+def get_extension_summary(db: Session, extension_id: str) -> List[ResumenFuncionalidad]:
+    """Obtiene el resumen de todas las funcionalidades de una extensión (las más falladas primero)."""
+    return db.query(ResumenFuncionalidad).filter(
+        ResumenFuncionalidad.id_extension_fk == extension_id
+    ).order_by(
+        ResumenFuncionalidad.tasa_fallos.desc(),
+        ResumenFuncionalidad.total_fallos.desc()
+    ).all()
+
+def get_most_failing_functionalities(db: Session, limit: int = 20, min_reportes: int = 1) -> List[ResumenFuncionalidad]:
+    """
+    Obtiene las funcionalidades con mayor tasa de fallos de toda la plataforma.
+    Se sirve desde el resumen materializado usando el índice (tasa_fallos, total_fallos).
+    """
+    return db.query(ResumenFuncionalidad).filter(
+        ResumenFuncionalidad.total_fallos > 0,
+        ResumenFuncionalidad.total_reportes >= min_reportes
+    ).order_by(
+        ResumenFuncionalidad.tasa_fallos.desc(),
+        ResumenFuncionalidad.total_fallos.desc()
+    ).limit(limit).all()
@@ -1,5 +1,7 @@
+from sqlalchemy import select, update, delete, or_
 from sqlalchemy.orm import Session
 from datetime import datetime
+from typing import List, Optional
 import uuid # Para generar IDs únicos
 from ..models.user_models import User, DeviceSession
 from ..models.user_models import SessionCreate
@@ -59,4 +61,56 @@ def revoke_session(db: Session, token: str) -> bool:
         return True
     return False
 
+# ----------------- Funciones Masivas de Sesiones -----------------
+
+def get_user_sessions(db: Session, user_id: str, solo_activas: bool = True) -> List[DeviceSession]:
+    """Obtiene las sesiones de un usuario (por defecto solo las activas), la más reciente primero."""
+    query = db.query(DeviceSession).filter(DeviceSession.id_usuario_fk == user_id)
+    if solo_activas:
+        query = query.filter(DeviceSession.activo == True)
+    return query.order_by(DeviceSession.timestamp_ultima_actividad.desc()).all()
+
+def revoke_all_user_sessions(db: Session, user_id: str, excepto_token: Optional[str] = None) -> int:
+    """
+    Revoca todas las sesiones activas de un usuario con un único UPDATE.
+    Si se indica `excepto_token`, esa sesión se conserva. Retorna el número de sesiones revocadas.
+    """
+    stmt = update(DeviceSession).where(
+        DeviceSession.id_usuario_fk == user_id,
+        DeviceSession.activo == True
+    )
+    if excepto_token:
+        stmt = stmt.where(DeviceSession.token_sesion != excepto_token)
+
+    result = db.execute(stmt.values(activo=False).execution_options(synchronize_session=False))
+    db.commit()
+    return result.rowcount
+
+def delete_expired_sessions(db: Session, inactivas_desde: datetime, batch_size: int = 1000) -> int:
+    """
+    Elimina, por lotes de `batch_size`, las sesiones revocadas y las que no tienen actividad
+    desde `inactivas_desde`. Cada lote es una transacción corta para no bloquear la tabla.
+    Retorna el número total de sesiones eliminadas.
+    """
+    total = 0
+    while True:
+        lote = (
+            select(DeviceSession.token_sesion)
+            .where(or_(
+                DeviceSession.activo == False,
+                DeviceSession.timestamp_ultima_actividad < inactivas_desde
+            ))
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        result = db.execute(
+            delete(DeviceSession)
+            .where(DeviceSession.token_sesion.in_(lote))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        total += result.rowcount
+        if result.rowcount < batch_size:
+            return total
+
 # ... (Aquí irían funciones para vincular email, añadir sesión, etc.)
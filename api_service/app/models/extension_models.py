@@ -1,11 +1,23 @@
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional
-from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, Text
+from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, Text, Integer, Float, Index, DDL, event, func, literal_column
 from sqlalchemy.orm import relationship
 from ..core.db_base import Base 
 
 
+def search_document(nombre, prompt_original):
+    """
+    Documento de búsqueda (tsvector) de una extensión: nombre + prompt.
+    Se usa la MISMA expresión en el índice GIN y en las consultas para que
+    PostgreSQL pueda aprovechar el índice.
+    """
+    return func.to_tsvector(
+        literal_column("'simple'"),
+        func.coalesce(nombre, literal_column("''")) + literal_column("' '") + prompt_original
+    )
+
+
 # ----------------- A. Modelos ORM/DB (Definición de Tablas PostgreSQL) -----------------
 
 class Extension(Base):
@@ -26,8 +38,84 @@ class Extension(Base):
     timestamp_creacion = Column(DateTime, default=datetime.utcnow)
     timestamp_actualizacion = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Índices de búsqueda (solo PostgreSQL; en SQLite se usa el índice invertido en Python)
+    __table_args__ = (
+        Index(
+            "ix_extensiones_busqueda_fts",
+            search_document(nombre, prompt_original),
+            postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_extensiones_codigo_trgm",
+            codigo_generado,
+            postgresql_using="gin",
+            postgresql_ops={"codigo_generado": "gin_trgm_ops"}
+        ).ddl_if(dialect="postgresql"),
+    )
+
     # Relación: La extensión pertenece a un solo usuario
     usuario = relationship("User", back_populates="extensiones")
+    # Relación: Feedback granular por funcionalidad y su resumen agregado
+    feedback = relationship("FeedbackFuncionalidad", back_populates="extension", cascade="all, delete-orphan")
+    resumen_funcionalidades = relationship("ResumenFuncionalidad", cascade="all, delete-orphan")
+
+class FeedbackFuncionalidad(Base):
+    """Tabla 'feedback_funcionalidades': Valoraciones y reportes de fallo de una funcionalidad concreta."""
+    __tablename__ = "feedback_funcionalidades"
+
+    # Clave Primaria (PK)
+    id_feedback = Column(String, primary_key=True)
+
+    # Claves Foráneas (FK)
+    id_extension_fk = Column(String, ForeignKey("extensiones.id_extension"), index=True)
+    id_usuario_fk = Column(String, ForeignKey("usuarios.id_usuario"))
+
+    # Datos del Feedback
+    funcionalidad = Column(String, nullable=False) # Nombre de la funcionalidad evaluada
+    puntuacion = Column(Integer, nullable=True)    # 1-5 (nulo si solo se reporta un fallo)
+    es_fallo = Column(Boolean, default=False)      # True = reporte de fallo
+    descripcion_fallo = Column(Text, nullable=True)
+
+    timestamp_creacion = Column(DateTime, default=datetime.utcnow)
+
+    # Relación: El feedback pertenece a una sola extensión
+    extension = relationship("Extension", back_populates="feedback")
+
+class ResumenFuncionalidad(Base):
+    """
+    Tabla 'resumen_funcionalidades': Agregados por (extensión, funcionalidad).
+    Funciona como una vista materializada mantenida de forma incremental en cada
+    feedback, para no recorrer las valoraciones en cada consulta.
+    """
+    __tablename__ = "resumen_funcionalidades"
+    __table_args__ = (
+        # Consulta de "funcionalidades con más fallos"
+        Index("ix_resumen_funcionalidades_fallos", "tasa_fallos", "total_fallos"),
+    )
+
+    # Clave Primaria (PK) compuesta
+    id_extension_fk = Column(String, ForeignKey("extensiones.id_extension"), primary_key=True)
+    funcionalidad = Column(String, primary_key=True)
+
+    # Contadores
+    total_reportes = Column(Integer, default=0, nullable=False)     # Todo el feedback recibido
+    total_valoraciones = Column(Integer, default=0, nullable=False) # Feedback con puntuación
+    suma_puntuaciones = Column(Integer, default=0, nullable=False)
+    total_fallos = Column(Integer, default=0, nullable=False)
+
+    # Métricas derivadas (se actualizan junto con los contadores)
+    puntuacion_media = Column(Float, nullable=True)
+    puntuacion_reciente = Column(Float, nullable=True) # Media móvil exponencial de la puntuación
+    tasa_fallos = Column(Float, default=0.0, nullable=False)
+
+    timestamp_ultimo_feedback = Column(DateTime, default=datetime.utcnow)
+
+# La extensión pg_trgm es necesaria para el índice 'gin_trgm_ops' sobre el código generado
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
 
 # ----------------- B. Esquemas Pydantic (API Input/Output) -----------------
 
@@ -44,5 +132,59 @@ class ExtensionPublic(BaseModel):
     codigo_generado: Optional[str] = None # Opcional porque puede ser generado después
     timestamp_creacion: datetime
     
+    class Config:
+        from_attributes = True
+
+# Esquema de un resultado de búsqueda (Output)
+class ExtensionSearchResult(BaseModel):
+    id_extension: str
+    nombre: str
+    fragmento: Optional[str] = None # Texto con las coincidencias resaltadas con <b>...</b>
+    puntuacion: float
+    timestamp_creacion: datetime
+
+# Página de resultados de búsqueda (Output)
+class ExtensionSearchPage(BaseModel):
+    resultados: list[ExtensionSearchResult]
+    siguiente_cursor: Optional[str] = None # Nulo cuando no hay más resultados
+
+# Esquema para enviar feedback de una funcionalidad (Input)
+class FeedbackCreate(BaseModel):
+    funcionalidad: str = Field(..., max_length=150, description="Funcionalidad de la extensión que se evalúa.")
+    puntuacion: Optional[int] = Field(None, ge=1, le=5)
+    es_fallo: bool = False
+    descripcion_fallo: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_contenido(self):
+        if self.puntuacion is None and not self.es_fallo:
+            raise ValueError("El feedback debe incluir una puntuación o un reporte de fallo.")
+        return self
+
+# Esquema de Salida del feedback registrado (Output)
+class FeedbackPublic(BaseModel):
+    id_feedback: str
+    id_extension_fk: str
+    funcionalidad: str
+    puntuacion: Optional[int] = None
+    es_fallo: bool
+    descripcion_fallo: Optional[str] = None
+    timestamp_creacion: datetime
+
+    class Config:
+        from_attributes = True
+
+# Esquema de Salida del resumen agregado de una funcionalidad (Output)
+class ResumenFuncionalidadPublic(BaseModel):
+    id_extension_fk: str
+    funcionalidad: str
+    total_reportes: int
+    total_valoraciones: int
+    total_fallos: int
+    puntuacion_media: Optional[float] = None
+    puntuacion_reciente: Optional[float] = None
+    tasa_fallos: float
+    timestamp_ultimo_feedback: datetime
+
     class Config:
         from_attributes = True
\ No newline at end of file
@@ -1,7 +1,7 @@
 from datetime import datetime
 from pydantic import BaseModel, EmailStr, Field
 from typing import Optional
-from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from ..core.db_base import Base 
 
@@ -28,7 +28,7 @@ class DeviceSession(Base):
     __tablename__ = "dispositivos_sesiones"
 
     # Clave Primaria (PK) - El token es el identificador único de la sesión
-    token_sesion = Column(String, primary_key=True, index=True) 
+    token_sesion = Column(String, primary_key=True) # La PK ya está indexada
 
     # Referencia a la tabla 'usuarios'
     id_usuario_fk = Column(String, ForeignKey("usuarios.id_usuario"))
@@ -37,6 +37,18 @@ class DeviceSession(Base):
     timestamp_ultima_actividad = Column(DateTime, default=datetime.utcnow)
     activo = Column(Boolean, default=True) # Clave de revocación (True = activo, False = revocado)
 
+    __table_args__ = (
+        # Índice parcial: solo cubre las sesiones activas de cada usuario
+        Index(
+            "ix_dispositivos_sesiones_usuario_activo",
+            id_usuario_fk,
+            postgresql_where=(activo == True),
+            sqlite_where=(activo == True)
+        ),
+        # Barrido de sesiones inactivas
+        Index("ix_dispositivos_sesiones_actividad", timestamp_ultima_actividad),
+    )
+
     # Relación: La sesión pertenece a un solo usuario
     usuario = relationship("User", back_populates="sesiones")
 
@@ -0,0 +1,166 @@
+import io
+import json
+import tarfile
+import time
+import zipfile
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..core.config import get_settings
+from ..core.db_setup import SessionLocal
+from ..crud import crud_extension
+from . import extension_utils
+
+# Columnas exportadas (en este orden) y las que contienen fechas
+EXPORT_COLUMNS = (
+    "id_extension",
+    "id_usuario_fk",
+    "nombre",
+    "prompt_original",
+    "codigo_generado",
+    "timestamp_creacion",
+    "timestamp_actualizacion",
+)
+DATETIME_COLUMNS = ("timestamp_creacion", "timestamp_actualizacion")
+
+# Nombre del archivo de metadatos incluido en cada ZIP del archivo tar
+METADATA_FILENAME = "ceb_extension.json"
+
+FORMATOS = ("ndjson", "tar")
+
+
+# ----------------- Serialización -----------------
+
+def row_to_json(row: Dict[str, Any]) -> str:
+    """Serializa una fila de 'extensiones' como una línea JSON."""
+    data = {col: row.get(col) for col in EXPORT_COLUMNS}
+    for col in DATETIME_COLUMNS:
+        if data[col] is not None:
+            data[col] = data[col].isoformat()
+    return json.dumps(data, ensure_ascii=False)
+
+def json_to_row(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Convierte un objeto JSON exportado en una fila lista para insertar (ValueError si no es válido)."""
+    if not isinstance(data, dict):
+        raise ValueError("Cada extensión debe ser un objeto JSON.")
+    if not data.get("id_extension") or data.get("prompt_original") is None:
+        raise ValueError("Cada extensión debe incluir 'id_extension' y 'prompt_original'.")
+    row = {col: data.get(col) for col in EXPORT_COLUMNS}
+    for col in ("id_extension", "id_usuario_fk", "nombre", "prompt_original", "codigo_generado"):
+        if row[col] is not None and not isinstance(row[col], str):
+            raise ValueError(f"'{col}' debe ser una cadena.")
+    for col in DATETIME_COLUMNS:
+        if row[col] is not None and not isinstance(row[col], str):
+            raise ValueError(f"'{col}' debe ser una fecha ISO 8601 o null.")
+        row[col] = datetime.fromisoformat(row[col]) if row[col] else datetime.utcnow()
+    return row
+
+def extension_zip(row: Dict[str, Any]) -> bytes:
+    """
+    Genera el ZIP de una extensión: los archivos de su código generado
+    más un archivo de metadatos que permite restaurarla.
+    """
+    files = extension_utils.parse_gemini_response(row.get("codigo_generado") or "")
+    files[METADATA_FILENAME] = row_to_json(row)
+    return extension_utils.create_zip_from_files(files)
+
+
+# ----------------- Exportación (generadores de bytes) -----------------
+
+def _stream_rows(batch_size: int) -> Iterator[Dict[str, Any]]:
+    """Abre su propia sesión (el generador vive más que la solicitud) y recorre todas las filas."""
+    db: Session = SessionLocal()
+    try:
+        yield from crud_extension.stream_all_extensions(db, batch_size=batch_size)
+    finally:
+        db.close()
+
+def iter_ndjson(batch_size: Optional[int] = None) -> Iterator[bytes]:
+    """Exporta todas las extensiones como NDJSON (una extensión por línea)."""
+    for row in _stream_rows(batch_size or get_settings().EXPORT_BATCH_SIZE):
+        yield (row_to_json(row) + "\n").encode("utf-8")
+
+def _tar_member(nombre: str, data: bytes, mtime: float) -> Iterator[bytes]:
+    """Cabecera, contenido y relleno de un miembro del tar."""
+    info = tarfile.TarInfo(nombre)
+    info.size = len(data)
+    info.mtime = mtime
+    yield info.tobuf(format=tarfile.PAX_FORMAT)
+    yield data
+    resto = len(data) % tarfile.BLOCKSIZE
+    if resto:
+        yield tarfile.NUL * (tarfile.BLOCKSIZE - resto)
+
+def iter_tar(batch_size: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Exporta todas las extensiones como un tar con un ZIP por extensión ('<id>.zip').
+    El tar se escribe a mano, miembro a miembro, para no acumularlo en memoria.
+    """
+    escritos = 0
+    mtime = time.time()
+    for row in _stream_rows(batch_size or get_settings().EXPORT_BATCH_SIZE):
+        for chunk in _tar_member(f"{row['id_extension']}.zip", extension_zip(row), mtime):
+            escritos += len(chunk)
+            yield chunk
+
+    # Fin de archivo: dos bloques vacíos, rellenando hasta completar un registro
+    fin = tarfile.NUL * (tarfile.BLOCKSIZE * 2)
+    escritos += len(fin)
+    resto = escritos % tarfile.RECORDSIZE
+    if resto:
+        fin += tarfile.NUL * (tarfile.RECORDSIZE - resto)
+    yield fin
+
+def iter_export(formato: str, batch_size: Optional[int] = None) -> Iterator[bytes]:
+    """Selecciona el generador de exportación según el formato ('ndjson' o 'tar')."""
+    if formato == "ndjson":
+        return iter_ndjson(batch_size)
+    if formato == "tar":
+        return iter_tar(batch_size)
+    raise ValueError(f"Formato de exportación no soportado: {formato}")
+
+
+# ----------------- Importación -----------------
+
+def rows_from_ndjson(lines: Iterable[bytes | str]) -> Iterator[Dict[str, Any]]:
+    """Lee un NDJSON línea a línea (ignora líneas vacías)."""
+    for numero, line in enumerate(lines, start=1):
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        if not line.strip():
+            continue
+        try:
+            yield json_to_row(json.loads(line))
+        except (json.JSONDecodeError, ValueError) as e:
+            raise ValueError(f"Línea {numero} inválida: {e}")
+
+def rows_from_tar(fileobj: BinaryIO) -> Iterator[Dict[str, Any]]:
+    """Lee un tar de exportación en modo flujo, extrayendo los metadatos de cada ZIP."""
+    try:
+        with tarfile.open(fileobj=fileobj, mode="r|") as tar:
+            for member in tar:
+                if not member.isfile() or not member.name.endswith(".zip"):
+                    continue
+                zip_bytes = tar.extractfile(member).read()
+                with zipfile.ZipFile(io.BytesIO(zip_bytes)) as zipf:
+                    yield json_to_row(json.loads(zipf.read(METADATA_FILENAME).decode("utf-8")))
+    except (tarfile.TarError, zipfile.BadZipFile, KeyError) as e:
+        raise ValueError(f"El archivo no es una exportación tar válida: {e}")
+
+def import_rows(rows: Iterable[Dict[str, Any]], batch_size: Optional[int] = None) -> Tuple[int, int]:
+    """Inserta en bloque las filas importadas. Retorna (insertadas, omitidas por ya existir)."""
+    db: Session = SessionLocal()
+    try:
+        return crud_extension.bulk_insert_extensions(db, rows, batch_size=batch_size or get_settings().EXPORT_BATCH_SIZE)
+    finally:
+        db.close()
+
+def import_file(fileobj: BinaryIO, formato: str, batch_size: Optional[int] = None) -> Tuple[int, int]:
+    """Importa una exportación ('ndjson' o 'tar') desde un archivo binario."""
+    if formato == "ndjson":
+        return import_rows(rows_from_ndjson(fileobj), batch_size)
+    if formato == "tar":
+        return import_rows(rows_from_tar(fileobj), batch_size)
+    raise ValueError(f"Formato de importación no soportado: {formato}")
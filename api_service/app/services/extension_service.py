@@ -1,10 +1,11 @@
 import asyncio
-from typing import Optional, Dict
+import threading
+from typing import Optional, Dict, List
 from sqlalchemy.orm import Session
 import io
 import zipfile
 
-from ..core import gemini_client
+from ..core import llm_backend
 from ..crud import crud_extension
 from ..models.extension_models import Extension
 from ..core.db_setup import SessionLocal 
@@ -12,19 +13,61 @@ from . import extension_utils
 
 # Constante para indicar un ZIP fallido o un error en el código_generado
 ERROR_CODE = "GENERATION_FAILED"
+# Marca guardada cuando el usuario cancela la generación
+CANCELLED_CODE = ERROR_CODE + ": Generación cancelada por el usuario."
+# Marca guardada cuando el servidor se detiene antes de completar la generación
+SHUTDOWN_CODE = ERROR_CODE + ": Generación interrumpida por el apagado del servidor."
+
+class GenerationCancelled(Exception):
+    """La generación fue cancelada mientras se ejecutaba."""
+
+class CancelToken(threading.Event):
+    """Señal de cancelación de una generación, con el código que debe guardarse al cancelarla."""
+
+    codigo = CANCELLED_CODE
+
+    def cancel(self, codigo: str = CANCELLED_CODE) -> None:
+        self.codigo = codigo
+        self.set()
+
+async def _generate_cancellable(coro, cancel_event: Optional[threading.Event]) -> Optional[str]:
+    """
+    Espera la respuesta de la IA comprobando periódicamente si se pidió cancelar.
+    Al cancelar se cancela la tarea y se levanta GenerationCancelled. El worker solo queda
+    libre al momento si el backend no bloquea el cierre de asyncio.run (GeminiBackend
+    ejecuta la llamada al SDK en un hilo propio que nadie espera; su respuesta se descarta).
+    """
+    task = asyncio.ensure_future(coro)
+    while not task.done():
+        if cancel_event is not None and cancel_event.is_set():
+            task.cancel()
+            raise GenerationCancelled()
+        await asyncio.wait({task}, timeout=0.1)
+    return task.result()
+
+def _save_result(db: Session, extension_id: str, codigo: str) -> bool:
+    """Guarda el resultado si la extensión sigue pendiente; si no (p. ej. cancelada), lo descarta."""
+    if crud_extension.update_generated_code_if_pending(db, extension_id, codigo):
+        return True
+    print(f"Resultado de la extensión {extension_id} descartado: ya tenía código (p. ej. cancelada).")
+    return False
 
 def process_and_save_extension(
     extension_id: str, 
     prompt: str, 
     funcionalidades: Optional[str] = None, 
     identificadores: Optional[str] = None, 
-    zip_bytes: Optional[bytes] = None
+    zip_bytes: Optional[bytes] = None,
+    cancel_event: Optional[threading.Event] = None
 ):
     """
     Función síncrona que ejecuta la tarea en segundo plano: 
     llama a la IA, procesa la respuesta y guarda el código generado.
     
     Recibe los bytes del ZIP y los convierte a texto de referencia.
+    Si `cancel_event` se activa, se detiene antes de escribir el resultado en la DB.
+    Todas las escrituras son condicionales (codigo_generado NULL), así que una cancelación
+    registrada en la DB desde cualquier proceso impide guardar el resultado.
     """
     
     db: Session = SessionLocal()
@@ -36,6 +79,11 @@ def process_and_save_extension(
         print(f"Error fatal: Extensión {extension_id} no encontrada en la DB.")
         db.close()
         return
+    if extension.codigo_generado is not None:
+        # Cancelada (o ya completada) antes de empezar: no se llama a la IA
+        print(f"Generación de la extensión {extension_id} omitida: ya tiene código.")
+        db.close()
+        return
 
     try:
         if zip_bytes:
@@ -43,23 +91,30 @@ def process_and_save_extension(
                 codigo_referencia = extension_utils.zip_a_texto(zip_bytes)
                 print(f"ZIP de referencia procesado a texto para extensión {extension_id}")
             except ValueError as e:
-                crud_extension.update_generated_code(db, extension, ERROR_CODE + f": Error al procesar ZIP: {str(e)}")
+                _save_result(db, extension_id, ERROR_CODE + f": Error al procesar ZIP: {str(e)}")
                 db.close()
                 return
 
         # Llamar a la IA para obtener el código estructurado (asíncrona)
         structured_response = asyncio.run(
-            gemini_client.generate_extension_code(
-                prompt_principal=prompt,
-                funcionalidades=funcionalidades,
-                identificadores=identificadores,
-                codigo_referencia=codigo_referencia
+            _generate_cancellable(
+                llm_backend.generate_extension_code(
+                    prompt_principal=prompt,
+                    funcionalidades=funcionalidades,
+                    identificadores=identificadores,
+                    codigo_referencia=codigo_referencia
+                ),
+                cancel_event
             )
         )
 
+        # Última comprobación antes de escribir en la DB
+        if cancel_event is not None and cancel_event.is_set():
+            raise GenerationCancelled()
+
         if not structured_response:
             # Fallo en la llamada a la API
-            crud_extension.update_generated_code(db, extension, ERROR_CODE + ": API fallida o respuesta vacía.")
+            _save_result(db, extension_id, ERROR_CODE + ": API fallida o respuesta vacía.")
             db.close()
             return
 
@@ -69,7 +124,7 @@ def process_and_save_extension(
         if not file_dict or "manifest.json" not in file_dict:
             # Fallo en el análisis (formato incorrecto de Gemini)
             # Guardamos la respuesta cruda para depuración
-            crud_extension.update_generated_code(db, extension, ERROR_CODE + ": Formato de salida incorrecto. Respuesta: " + structured_response[:200])
+            _save_result(db, extension_id, ERROR_CODE + ": Formato de salida incorrecto. Respuesta: " + structured_response[:200])
             db.close()
             return
 
@@ -78,15 +133,26 @@ def process_and_save_extension(
         
         # Actualizar el registro en la DB con el código completo (para depuración)
         extension_text = structured_response 
-        crud_extension.update_generated_code(db, extension, extension_text)
-        
-
-        print(f"Extensión {extension_id} generada, procesada y código/ZIP guardado.")
+        if _save_result(db, extension_id, extension_text):
+            print(f"Extensión {extension_id} generada, procesada y código/ZIP guardado.")
             
+    except GenerationCancelled:
+        print(f"Generación de la extensión {extension_id} cancelada.")
+        # Si la cancelación vino del endpoint, la marca ya está en la DB y esto no cambia nada
+        crud_extension.update_generated_code_if_pending(db, extension_id, getattr(cancel_event, "codigo", CANCELLED_CODE))
+
     except Exception as e:
         print(f"Excepción al procesar la extensión {extension_id}: {e}")
         # Reportar el error en la DB
-        crud_extension.update_generated_code(db, extension, ERROR_CODE + f": Error interno del servicio: {str(e)[:50]}")
+        _save_result(db, extension_id, ERROR_CODE + f": Error interno del servicio: {str(e)[:50]}")
             
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def mark_pending_generations(extension_ids: List[str], codigo: str) -> int:
+    """Guarda `codigo` en las extensiones que nunca llegarán a generarse (p. ej. al apagar el servidor)."""
+    db: Session = SessionLocal()
+    try:
+        return crud_extension.mark_pending_extensions(db, extension_ids, codigo)
+    finally:
+        db.close()
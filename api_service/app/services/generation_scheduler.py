@@ -0,0 +1,215 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+from ..core.config import get_settings
+from . import extension_service
+
+# Clases de prioridad, de mayor a menor
+PRIORIDADES = ("interactiva", "lote", "regeneracion")
+
+# Peso de cada clase en el reparto de workers (round-robin ponderado): con todas las
+# colas llenas, de cada 10 trabajos 6 son interactivos, 3 de lote y 1 de regeneración.
+# Así las interactivas adelantan a las masivas sin dejar a ninguna clase sin servicio.
+PESOS = {"interactiva": 6, "lote": 3, "regeneracion": 1}
+
+# Estados de una tarea
+EN_COLA = "en_cola"
+EJECUTANDO = "ejecutando"
+
+# Segundos que stop() concede a las generaciones en curso antes de cancelarlas, y margen
+# para que las canceladas registren SHUTDOWN_CODE (la cancelación se comprueba cada 0.1 s)
+STOP_TIMEOUT = 30.0
+CANCEL_GRACE = 5.0
+
+
+@dataclass
+class GenerationJob:
+    """Una generación pendiente o en curso."""
+    extension_id: str
+    user_id: str
+    prioridad: str
+    kwargs: Dict[str, Any]
+    estado: str = EN_COLA
+    cancel_event: extension_service.CancelToken = field(default_factory=extension_service.CancelToken)
+    terminada: threading.Event = field(default_factory=threading.Event) # Ejecutada, cancelada o descartada
+    enviada_en: float = field(default_factory=time.perf_counter)
+    terminada_en: Optional[float] = None
+
+    def _finish(self) -> None:
+        self.terminada_en = time.perf_counter()
+        self.terminada.set()
+
+
+class GenerationScheduler:
+    """
+    Planificador en proceso de las generaciones de IA (sustituye a BackgroundTasks).
+
+    - Prioridades: round-robin ponderado (PESOS) entre las clases con trabajos en cola.
+    - Reparto justo: dentro de cada clase, los usuarios se atienden por turnos, de modo
+      que un usuario con muchas peticiones no bloquea a los demás.
+    - Cancelación: las tareas en cola se descartan; las que se están ejecutando se
+      detienen de forma cooperativa antes de escribir el resultado en la DB.
+    - Parada (stop): ninguna tarea se pierde en silencio; las que no terminan quedan
+      registradas con SHUTDOWN_CODE.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self._workers = workers # None = GENERATION_WORKERS (se lee al arrancar)
+        self._cond = threading.Condition()
+        # prioridad -> {user_id: cola de tareas}; el orden del dict es el turno de los usuarios
+        self._colas: Dict[str, "OrderedDict[str, Deque[GenerationJob]]"] = {p: OrderedDict() for p in PRIORIDADES}
+        self._creditos: Dict[str, int] = {p: 0 for p in PRIORIDADES}
+        self._jobs: Dict[str, GenerationJob] = {} # extension_id -> tarea en cola o en ejecución
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+
+    # ----------------- API pública -----------------
+
+    def submit(self, extension_id: str, user_id: str, prioridad: str = "interactiva", **kwargs) -> GenerationJob:
+        """Encola la generación de una extensión (los workers se arrancan en el primer uso)."""
+        if prioridad not in PRIORIDADES:
+            raise ValueError(f"Prioridad no soportada: {prioridad}")
+
+        job = GenerationJob(extension_id=extension_id, user_id=user_id, prioridad=prioridad, kwargs=kwargs)
+        with self._cond:
+            self._ensure_started_locked()
+            self._colas[prioridad].setdefault(user_id, deque()).append(job)
+            self._jobs[extension_id] = job
+            self._cond.notify()
+        return job
+
+    def cancel(self, extension_id: str) -> Optional[str]:
+        """
+        Cancela la generación de una extensión. Retorna el estado en que se encontraba
+        (EN_COLA: descartada sin llamar a la IA; EJECUTANDO: se detendrá antes de guardar)
+        o None si no hay ninguna generación pendiente en este proceso.
+        """
+        with self._cond:
+            job = self._jobs.get(extension_id)
+            if job is None:
+                return None
+
+            if job.estado == EN_COLA:
+                cola_usuario = self._colas[job.prioridad][job.user_id]
+                cola_usuario.remove(job)
+                if not cola_usuario:
+                    del self._colas[job.prioridad][job.user_id]
+                del self._jobs[extension_id]
+                job._finish()
+
+            job.cancel_event.cancel()
+            return job.estado
+
+    def queued(self) -> Dict[str, int]:
+        """Número de tareas en cola por clase de prioridad."""
+        with self._cond:
+            return {p: sum(len(c) for c in self._colas[p].values()) for p in PRIORIDADES}
+
+    def stop(self, timeout: float = STOP_TIMEOUT) -> None:
+        """
+        Detiene los workers sin dejar extensiones con el código a NULL:
+        - las tareas en cola se retiran y se marcan con SHUTDOWN_CODE;
+        - las que se están ejecutando tienen `timeout` segundos para terminar; las que no lo
+          consiguen se cancelan y guardan SHUTDOWN_CODE sin esperar a la IA.
+        Bloquea hasta que terminan los workers: llamarlo desde un hilo, no desde el event loop.
+        """
+        with self._cond:
+            self._stopping = True
+            pendientes = [job for colas in self._colas.values() for cola in colas.values() for job in cola]
+            for colas in self._colas.values():
+                colas.clear()
+            for job in pendientes:
+                del self._jobs[job.extension_id]
+            threads, self._threads = self._threads, []
+            self._cond.notify_all()
+
+        if pendientes:
+            try:
+                extension_service.mark_pending_generations(
+                    [job.extension_id for job in pendientes], extension_service.SHUTDOWN_CODE
+                )
+            except Exception as e:
+                print(f"Error al marcar las generaciones en cola al detener el planificador: {e}")
+            print(f"Planificador detenido: {len(pendientes)} generaciones en cola marcadas como interrumpidas.")
+            for job in pendientes:
+                job._finish()
+
+        limite = time.monotonic() + timeout
+        for thread in threads:
+            thread.join(max(0.0, limite - time.monotonic()))
+
+        with self._cond:
+            en_curso = list(self._jobs.values())
+        for job in en_curso:
+            job.cancel_event.cancel(extension_service.SHUTDOWN_CODE)
+        limite = time.monotonic() + CANCEL_GRACE
+        for thread in threads:
+            thread.join(max(0.0, limite - time.monotonic()))
+
+    # ----------------- Internos -----------------
+
+    def _ensure_started_locked(self) -> None:
+        if self._threads:
+            return
+        self._stopping = False
+        for i in range(self._workers or get_settings().GENERATION_WORKERS):
+            thread = threading.Thread(target=self._worker, name=f"generation-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _next_job_locked(self) -> Optional[GenerationJob]:
+        """Elige la siguiente tarea: clase por round-robin ponderado, usuario por turnos."""
+        activas = [p for p in PRIORIDADES if self._colas[p]]
+        if not activas:
+            return None
+
+        # Round-robin ponderado "suave": cada clase activa acumula su peso y se elige la
+        # de mayor crédito (en empate, la de más prioridad), que paga el total repartido
+        for p in PRIORIDADES:
+            if p in activas:
+                self._creditos[p] += PESOS[p]
+            else:
+                self._creditos[p] = 0
+        elegida = max(activas, key=lambda p: self._creditos[p])
+        self._creditos[elegida] -= sum(PESOS[p] for p in activas)
+
+        colas = self._colas[elegida]
+        user_id, cola_usuario = next(iter(colas.items()))
+        job = cola_usuario.popleft()
+        if cola_usuario:
+            colas.move_to_end(user_id) # El usuario pasa al final del turno
+        else:
+            del colas[user_id]
+        return job
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                job = self._next_job_locked()
+                while job is None and not self._stopping:
+                    self._cond.wait()
+                    job = self._next_job_locked()
+                if job is None: # stop() vació las colas
+                    return
+                # Se marca en el mismo bloqueo en que se saca de la cola: stop() nunca la pierde
+                job.estado = EJECUTANDO
+
+            try:
+                extension_service.process_and_save_extension(
+                    extension_id=job.extension_id,
+                    cancel_event=job.cancel_event,
+                    **job.kwargs
+                )
+            except Exception as e:
+                print(f"Excepción en el worker de generación ({job.extension_id}): {e}")
+            finally:
+                with self._cond:
+                    self._jobs.pop(job.extension_id, None)
+                job._finish()
+
+
+# Instancia Global (los hilos se crean con la primera generación, no al importar)
+scheduler = GenerationScheduler()
@@ -0,0 +1,116 @@
+import html
+import re
+import threading
+import unicodedata
+from typing import Dict, List, Optional, Set, Tuple
+
+# Pesos por campo: un término en el nombre cuenta más que en el prompt o en el código
+PESO_NOMBRE = 3.0
+PESO_PROMPT = 1.0
+PESO_CODIGO = 0.5
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+def normalize(texto: str) -> str:
+    """Minúsculas y sin acentos ('Página' -> 'pagina')."""
+    descompuesto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+def tokenize(texto: Optional[str]) -> List[str]:
+    """Divide un texto en términos normalizados."""
+    if not texto:
+        return []
+    return _TOKEN_RE.findall(normalize(texto))
+
+def highlight(texto: str, terminos: Set[str], ancho: int = 160) -> str:
+    """
+    Retorna un fragmento HTML de `texto` alrededor de la primera coincidencia,
+    con los términos buscados resaltados con <b>...</b>. El texto del usuario se
+    escapa, de modo que las únicas etiquetas del fragmento son las de resaltado.
+    """
+    coincidencias = [m for m in _TOKEN_RE.finditer(texto) if normalize(m.group(0)) in terminos]
+    if not coincidencias:
+        return html.escape(texto[:ancho])
+
+    inicio = max(0, coincidencias[0].start() - ancho // 4)
+    fin = min(len(texto), inicio + ancho)
+    partes = []
+    cursor = inicio
+    for m in coincidencias:
+        if m.start() < inicio or m.end() > fin:
+            continue
+        partes.append(html.escape(texto[cursor:m.start()]))
+        partes.append(f"<b>{html.escape(m.group(0))}</b>")
+        cursor = m.end()
+    partes.append(html.escape(texto[cursor:fin]))
+    return ("..." if inicio > 0 else "") + "".join(partes) + ("..." if fin < len(texto) else "")
+
+
+class InvertedIndex:
+    """
+    Índice invertido en memoria (alternativa a tsvector/pg_trgm cuando la DB no es PostgreSQL).
+    Los documentos exigen TODOS los términos de la consulta y se ordenan por la frecuencia
+    de los términos ponderada por campo. La puntuación depende solo del documento (no del
+    tamaño del corpus), así que los cursores de paginación siguen siendo válidos aunque se
+    añadan o eliminen extensiones entre una página y la siguiente.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, float]] = {} # término -> {id_doc: peso}
+        self._docs: Dict[str, Tuple[str, str]] = {}      # id_doc -> (nombre, prompt)
+        self._doc_terms: Dict[str, Set[str]] = {}        # id_doc -> términos (para re-indexar)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, doc_id: str, nombre: str, prompt: str, codigo: Optional[str] = None) -> None:
+        """Indexa (o re-indexa) un documento."""
+        pesos: Dict[str, float] = {}
+        for peso, texto in ((PESO_NOMBRE, nombre), (PESO_PROMPT, prompt), (PESO_CODIGO, codigo)):
+            for termino in tokenize(texto):
+                pesos[termino] = pesos.get(termino, 0.0) + peso
+
+        with self._lock:
+            self._remove_locked(doc_id)
+            self._docs[doc_id] = (nombre or "", prompt or "")
+            self._doc_terms[doc_id] = set(pesos)
+            for termino, peso in pesos.items():
+                self._postings.setdefault(termino, {})[doc_id] = peso
+
+    def remove(self, doc_id: str) -> None:
+        """Elimina un documento del índice (si estaba)."""
+        with self._lock:
+            self._remove_locked(doc_id)
+
+    def _remove_locked(self, doc_id: str) -> None:
+        if self._docs.pop(doc_id, None) is None:
+            return
+        for termino in self._doc_terms.pop(doc_id):
+            del self._postings[termino][doc_id]
+            if not self._postings[termino]:
+                del self._postings[termino]
+
+    def document(self, doc_id: str) -> Optional[Tuple[str, str]]:
+        """Retorna (nombre, prompt) de un documento indexado."""
+        return self._docs.get(doc_id)
+
+    def search(self, consulta: str) -> List[Tuple[float, str]]:
+        """Retorna [(puntuación, id_doc)] ordenados por puntuación descendente e id ascendente."""
+        terminos = set(tokenize(consulta))
+        if not terminos:
+            return []
+
+        with self._lock:
+            listas = [self._postings.get(t, {}) for t in terminos]
+            if not all(listas):
+                return []
+            # Se intersecta partiendo de la lista más corta
+            listas.sort(key=len)
+            candidatos = set(listas[0]).intersection(*listas[1:])
+            puntuaciones = {
+                doc_id: sum(docs[doc_id] for docs in listas)
+                for doc_id in candidatos
+            }
+
+        return sorted(((p, d) for d, p in puntuaciones.items()), key=lambda r: (-r[0], r[1]))
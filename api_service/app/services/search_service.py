@@ -0,0 +1,252 @@
+import base64
+import html
+import json
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import Float, and_, cast, func, literal, literal_column, or_, select
+from sqlalchemy.orm import Session
+
+from ..models.extension_models import (
+    Extension,
+    ExtensionSearchPage,
+    ExtensionSearchResult,
+    search_document,
+)
+from . import search_index
+from .extension_service import ERROR_CODE
+
+# Marcadores de resaltado de ts_headline: caracteres de control que se eliminan del texto de
+# entrada, para poder escapar el HTML del resultado y solo después convertirlos en <b>...</b>
+_INICIO_RESALTADO = "\x02"
+_FIN_RESALTADO = "\x03"
+
+
+# ----------------- Cursor de Paginación -----------------
+
+def encode_cursor(puntuacion: float, id_extension: str) -> str:
+    """Cursor opaco con la posición (puntuación, id) del último resultado de la página."""
+    return base64.urlsafe_b64encode(json.dumps([puntuacion, id_extension]).encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    """Decodifica un cursor; levanta ValueError si es inválido."""
+    try:
+        puntuacion, id_extension = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return float(puntuacion), str(id_extension)
+    except Exception:
+        raise ValueError("Cursor de paginación inválido.")
+
+
+# ----------------- Búsqueda -----------------
+
+def _visible():
+    """Solo se buscan extensiones generadas correctamente."""
+    return and_(
+        Extension.codigo_generado.isnot(None),
+        Extension.codigo_generado.notlike(ERROR_CODE + "%")
+    )
+
+def search_extensions(db: Session, q: str, cursor: Optional[str] = None, limit: int = 20) -> ExtensionSearchPage:
+    """
+    Busca extensiones de toda la comunidad por nombre, prompt y código generado.
+    Usa tsvector/pg_trgm en PostgreSQL y un índice invertido en memoria en el resto de DBs.
+    Paginación por cursor (keyset) sobre (puntuación DESC, id ASC).
+    """
+    despues = decode_cursor(cursor) if cursor else None
+
+    if db.get_bind().dialect.name == "postgresql":
+        filas = _search_postgres(db, q, despues, limit + 1)
+    else:
+        filas = _search_fallback(db, q, despues, limit + 1)
+
+    siguiente = None
+    if len(filas) > limit:
+        filas = filas[:limit]
+        siguiente = encode_cursor(filas[-1].puntuacion, filas[-1].id_extension)
+
+    return ExtensionSearchPage(resultados=filas, siguiente_cursor=siguiente)
+
+def _search_postgres(db: Session, q: str, despues: Optional[Tuple[float, str]], limit: int) -> List[ExtensionSearchResult]:
+    """Búsqueda con el índice GIN de tsvector (nombre + prompt) y el de trigramas (código)."""
+    consulta = func.websearch_to_tsquery(literal_column("'simple'"), q)
+    documento = search_document(Extension.nombre, Extension.prompt_original)
+    patron = "%" + q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+    # 1) Coincidencias y puntuación (solo id + puntuación, para ordenar y paginar)
+    coincidencias = (
+        select(
+            Extension.id_extension.label("id_extension"),
+            (
+                cast(func.ts_rank_cd(documento, consulta), Float)
+                + cast(func.word_similarity(q, func.coalesce(Extension.codigo_generado, "")), Float) * 0.1
+            ).label("puntuacion"),
+        )
+        .where(_visible(), or_(documento.op("@@")(consulta), Extension.codigo_generado.ilike(patron)))
+        .subquery()
+    )
+
+    pagina = select(coincidencias.c.id_extension, coincidencias.c.puntuacion)
+    if despues:
+        puntuacion, id_extension = despues
+        pagina = pagina.where(or_(
+            coincidencias.c.puntuacion < puntuacion,
+            and_(coincidencias.c.puntuacion == puntuacion, coincidencias.c.id_extension > id_extension),
+        ))
+    pagina = pagina.order_by(coincidencias.c.puntuacion.desc(), coincidencias.c.id_extension).limit(limit).subquery()
+
+    # 2) Resaltado (ts_headline es costoso): solo para las filas de la página
+    stmt = (
+        select(
+            Extension.id_extension,
+            Extension.nombre,
+            Extension.timestamp_creacion,
+            pagina.c.puntuacion,
+            func.ts_headline(
+                literal_column("'simple'"),
+                func.translate(
+                    func.coalesce(Extension.nombre, "") + " " + Extension.prompt_original,
+                    literal(_INICIO_RESALTADO + _FIN_RESALTADO),
+                    literal("")
+                ),
+                consulta,
+                f"StartSel={_INICIO_RESALTADO}, StopSel={_FIN_RESALTADO}, MaxFragments=2",
+            ).label("fragmento"),
+        )
+        .join(pagina, pagina.c.id_extension == Extension.id_extension)
+        .order_by(pagina.c.puntuacion.desc(), pagina.c.id_extension)
+    )
+    return [
+        ExtensionSearchResult(**{**fila, "fragmento": _headline_to_html(fila["fragmento"])})
+        for fila in db.execute(stmt).mappings()
+    ]
+
+def _headline_to_html(fragmento: Optional[str]) -> Optional[str]:
+    """Escapa el fragmento de ts_headline y convierte sus marcadores en <b>...</b>."""
+    if fragmento is None:
+        return None
+    return html.escape(fragmento).replace(_INICIO_RESALTADO, "<b>").replace(_FIN_RESALTADO, "</b>")
+
+
+# ----------------- Alternativa sin PostgreSQL (p. ej. SQLite en pruebas) -----------------
+
+@dataclass
+class _FallbackState:
+    """Índice en memoria de una DB y lo que se sabe de las filas que contiene."""
+    indice: search_index.InvertedIndex = field(default_factory=search_index.InvertedIndex)
+    ids: Set[str] = field(default_factory=set)  # Filas de 'extensiones' ya vistas (indexadas o no)
+    marca: Optional[datetime] = None            # Mayor timestamp_actualizacion ya indexado
+    sincronizado: bool = False                  # Ya se cargó la tabla al menos una vez
+    lock: threading.Lock = field(default_factory=threading.Lock) # Una sincronización a la vez
+
+# Un índice por URL de DB
+_indices: Dict[str, _FallbackState] = {}
+_indices_lock = threading.Lock()
+
+# Ids por consulta IN al cargar filas concretas
+_FALLBACK_IN_BATCH = 500
+
+_FALLBACK_COLUMNS = (
+    Extension.id_extension,
+    Extension.nombre,
+    Extension.prompt_original,
+    Extension.codigo_generado,
+    Extension.timestamp_actualizacion,
+)
+
+def _index_row(estado: _FallbackState, fila) -> None:
+    """Indexa (o retira, si no es visible) una fila de 'extensiones'."""
+    codigo = fila.codigo_generado
+    if codigo is None or codigo.startswith(ERROR_CODE):
+        estado.indice.remove(fila.id_extension)
+    else:
+        estado.indice.add(fila.id_extension, fila.nombre, fila.prompt_original, codigo)
+    estado.ids.add(fila.id_extension)
+    if estado.marca is None or fila.timestamp_actualizacion > estado.marca:
+        estado.marca = fila.timestamp_actualizacion
+
+def _sync_fallback_index(db: Session) -> search_index.InvertedIndex:
+    """
+    Pone al día el índice en memoria sin recorrer la tabla en cada búsqueda:
+    - se re-indexan las filas con timestamp_actualizacion >= la última marca (extensiones
+      nuevas y generaciones que acaban de completarse);
+    - un COUNT(*) comparado con los ids ya vistos detecta bajas e importaciones que
+      conservan marcas de tiempo antiguas; solo entonces se leen los ids de la tabla.
+    Si otra solicitud ya está sincronizando, se busca en el índice tal como está.
+    Una baja que coincide con una importación antigua no cambia el COUNT: la baja se
+    descarta al armar la página (_search_fallback) y el alta se indexa en el siguiente
+    cambio del número de filas.
+    """
+    clave = str(db.get_bind().url)
+    with _indices_lock:
+        estado = _indices.setdefault(clave, _FallbackState())
+
+    # Solo la primera carga hace esperar a las demás búsquedas
+    if not estado.lock.acquire(blocking=not estado.sincronizado):
+        return estado.indice
+    try:
+        filas = db.scalar(select(func.count()).select_from(Extension))
+
+        stmt = select(*_FALLBACK_COLUMNS)
+        if estado.marca is not None:
+            # '>=' para no perder filas con la misma marca de tiempo (re-indexar es idempotente)
+            stmt = stmt.where(Extension.timestamp_actualizacion >= estado.marca)
+        for fila in db.execute(stmt.execution_options(yield_per=1000)):
+            _index_row(estado, fila)
+
+        if filas != len(estado.ids):
+            actuales = set(db.scalars(select(Extension.id_extension).execution_options(yield_per=10000)))
+            for id_extension in estado.ids - actuales:
+                estado.indice.remove(id_extension)
+            nuevas = list(actuales - estado.ids)
+            for i in range(0, len(nuevas), _FALLBACK_IN_BATCH):
+                lote = nuevas[i:i + _FALLBACK_IN_BATCH]
+                for fila in db.execute(select(*_FALLBACK_COLUMNS).where(Extension.id_extension.in_(lote))):
+                    _index_row(estado, fila)
+            estado.ids = actuales
+
+        estado.sincronizado = True
+        return estado.indice
+    finally:
+        estado.lock.release()
+
+def _search_fallback(db: Session, q: str, despues: Optional[Tuple[float, str]], limit: int) -> List[ExtensionSearchResult]:
+    """Búsqueda con el índice invertido en Python."""
+    indice = _sync_fallback_index(db)
+    terminos = set(search_index.tokenize(q))
+
+    aciertos = iter(indice.search(q))
+    resultados: List[ExtensionSearchResult] = []
+    while len(resultados) < limit:
+        pagina = []
+        for puntuacion, id_extension in aciertos:
+            if despues and not (puntuacion < despues[0] or (puntuacion == despues[0] and id_extension > despues[1])):
+                continue
+            documento = indice.document(id_extension)
+            if documento is None:
+                continue # Retirado por una sincronización concurrente
+            pagina.append((puntuacion, id_extension, documento))
+            if len(pagina) >= limit - len(resultados):
+                break
+        if not pagina:
+            break
+
+        creacion = dict(db.execute(
+            select(Extension.id_extension, Extension.timestamp_creacion)
+            .where(Extension.id_extension.in_([id_extension for _, id_extension, _ in pagina]))
+        ).all())
+
+        for puntuacion, id_extension, (nombre, prompt) in pagina:
+            if id_extension not in creacion:
+                # Eliminada de la DB: se retira ya; la próxima sincronización la reconcilia
+                indice.remove(id_extension)
+                continue
+            resultados.append(ExtensionSearchResult(
+                id_extension=id_extension,
+                nombre=nombre,
+                fragmento=search_index.highlight(f"{nombre} {prompt}", terminos),
+                puntuacion=puntuacion,
+                timestamp_creacion=creacion[id_extension],
+            ))
+    return resultados
@@ -0,0 +1,55 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from ..core.config import get_settings
+from ..core.db_setup import SessionLocal
+from ..crud import crud_user
+
+# Tarea de fondo del barrido (una por proceso/worker)
+_task: Optional[asyncio.Task] = None
+
+def sweep_expired_sessions() -> int:
+    """Elimina las sesiones revocadas o sin actividad en SESSION_IDLE_DAYS días. Retorna cuántas eliminó."""
+    settings = get_settings()
+    db: Session = SessionLocal()
+    try:
+        limite = datetime.utcnow() - timedelta(days=settings.SESSION_IDLE_DAYS)
+        return crud_user.delete_expired_sessions(db, limite, batch_size=settings.SESSION_SWEEP_BATCH_SIZE)
+    finally:
+        db.close()
+
+async def _run_periodically(intervalo: int) -> None:
+    """Ejecuta el barrido cada `intervalo` segundos (la primera vez tras esperar un intervalo)."""
+    while True:
+        await asyncio.sleep(intervalo)
+        try:
+            eliminadas = await run_in_threadpool(sweep_expired_sessions)
+            if eliminadas:
+                print(f"Barrido de sesiones: {eliminadas} sesiones caducadas o revocadas eliminadas.")
+        except Exception as e:
+            # Un fallo puntual (p. ej. la DB no disponible) no debe detener el barrido
+            print(f"Error en el barrido de sesiones: {e}")
+
+def start() -> None:
+    """Inicia el barrido periódico en el event loop actual (llamar desde el evento 'startup')."""
+    global _task
+    settings = get_settings()
+    if _task is None and settings.SESSION_SWEEP_INTERVAL_SECONDS > 0:
+        _task = asyncio.get_running_loop().create_task(
+            _run_periodically(settings.SESSION_SWEEP_INTERVAL_SECONDS)
+        )
+
+async def stop() -> None:
+    """Detiene el barrido periódico (llamar desde el evento 'shutdown')."""
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
@@ -0,0 +1,60 @@
+"""
+Herramientas de línea de comandos de CEB-AI.
+
+Uso:
+    python -m api_service.cli export --formato ndjson -o extensiones.ndjson
+    python -m api_service.cli import extensiones.ndjson --formato ndjson
+"""
+import argparse
+import sys
+
+from .app.services import export_service
+
+
+def _export(args: argparse.Namespace) -> None:
+    """Escribe la exportación en streaming al archivo indicado (o a stdout)."""
+    salida = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        for chunk in export_service.iter_export(args.formato, args.batch_size):
+            salida.write(chunk)
+    finally:
+        if args.output:
+            salida.close()
+
+
+def _import(args: argparse.Namespace) -> None:
+    """Importa una exportación desde un archivo (o desde stdin con '-')."""
+    entrada = sys.stdin.buffer if args.archivo == "-" else open(args.archivo, "rb")
+    try:
+        insertadas, omitidas = export_service.import_file(entrada, args.formato, args.batch_size)
+    finally:
+        if args.archivo != "-":
+            entrada.close()
+    print(
+        f"Importación completada: {insertadas} extensiones insertadas, {omitidas} omitidas (ya existían).",
+        file=sys.stderr
+    )
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="api_service.cli", description="Herramientas de CEB-AI.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_export = sub.add_parser("export", help="Exporta todas las extensiones.")
+    p_export.add_argument("--formato", choices=export_service.FORMATOS, default="ndjson")
+    p_export.add_argument("-o", "--output", help="Archivo de salida (por defecto stdout).")
+    p_export.add_argument("--batch-size", type=int, default=None)
+    p_export.set_defaults(func=_export)
+
+    p_import = sub.add_parser("import", help="Importa extensiones desde una exportación.")
+    p_import.add_argument("archivo", help="Archivo de entrada ('-' para stdin).")
+    p_import.add_argument("--formato", choices=export_service.FORMATOS, default="ndjson")
+    p_import.add_argument("--batch-size", type=int, default=None)
+    p_import.set_defaults(func=_import)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,18 @@
+from .app.core import startup_profile # Primero: mide todo lo que se importa después
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .app.core.config import settings
+from fastapi.concurrency import run_in_threadpool
+startup_profile.mark("import fastapi")
+from .app.core.config import get_settings
+# La app (título, CORS, prefijos) se construye al importar este módulo: aquí la configuración
+# se lee de inmediato. El motor de la DB y el SDK de Gemini se crean en su primer uso.
+settings = get_settings()
+startup_profile.mark("carga de configuración")
 from .app.core.db_setup import init_db_tables 
-from .app.api import user_routes, extension_routes
+from .app.api import user_routes, extension_routes, admin_routes
+from .app.services import session_sweeper
+from .app.services.generation_scheduler import scheduler
+startup_profile.mark("import de rutas y modelos")
 
 # Inicialización de la aplicación FastAPI
 app = FastAPI(
@@ -24,13 +34,27 @@ app.add_middleware(
 # Inclusión de las Rutas/Endpoints
 app.include_router(user_routes.router, prefix=settings.API_V1_STR + "/users", tags=["users"])
 app.include_router(extension_routes.router, prefix=settings.API_V1_STR + "/extensions")
+app.include_router(admin_routes.router, prefix=settings.API_V1_STR + "/admin")
+startup_profile.mark("construcción de la app")
 
 
 @app.on_event("startup")
 def startup_event():
     """Ejecuta tareas críticas como la conexión a la base de datos al inicio."""
     init_db_tables() 
+    startup_profile.mark("verificación del esquema de DB")
+    session_sweeper.start()
     print(f"CEB-AI API ({settings.VERSION}) iniciada y conectada a la DB.")
+    if settings.STARTUP_PROFILE:
+        print(startup_profile.report())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Detiene las tareas de fondo del proceso."""
+    await session_sweeper.stop()
+    # stop() espera a las generaciones en curso: fuera del event loop
+    await run_in_threadpool(scheduler.stop)
 
 
 @app.get("/")
@@ -0,0 +1,184 @@
+"""
+Simulación de carga del pipeline de generación, sin red ni cuota de Gemini.
+
+Envía N generaciones al planificador real (GenerationScheduler: prioridades, turnos por
+usuario, GENERATION_WORKERS y cancelación), que las ejecuta completas (IA -> análisis ->
+ZIP -> DB) contra el backend simulado, y muestra rendimiento, latencias y resultados.
+
+Uso:
+    python -m api_service.simulate -n 2000 --workers 32 --usuarios 8 --database-url sqlite:///sim.db \
+        --latencia-ms 300 --tasa-error 0.02 --tasa-truncada 0.02 --tasa-cancelacion 0.05
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+from collections import Counter, defaultdict
+
+
+def _percentil(valores, p):
+    """Percentil p (0-100) por el método del rango más cercano."""
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p / 100))]
+
+
+def _clasificar(codigo_generado):
+    """Agrupa el resultado guardado en la DB: 'ok' o el motivo del fallo."""
+    if codigo_generado is None:
+        return "sin resultado"
+    if not codigo_generado.startswith("GENERATION_FAILED"):
+        return "ok"
+    motivo = codigo_generado.split(":", 2)[1].strip()
+    return motivo.split(".")[0][:60]
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="api_service.simulate", description=__doc__.split("\n")[1])
+    parser.add_argument("-n", "--generaciones", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=None, help="Workers del planificador (por defecto GENERATION_WORKERS).")
+    parser.add_argument("--usuarios", type=int, default=4, help="Usuarios entre los que se reparten las generaciones.")
+    parser.add_argument(
+        "--mezcla", default="interactiva=0.2,lote=0.7,regeneracion=0.1",
+        help="Proporción de cada clase de prioridad ('clase=peso,...')."
+    )
+    parser.add_argument("--tasa-cancelacion", type=float, default=0.0, help="Fracción de generaciones canceladas tras enviarlas.")
+    parser.add_argument("--database-url", default=None, help="DB de la simulación (por defecto, un SQLite temporal; nunca DATABASE_URL).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--replay", default=None, help="JSONL de respuestas grabadas.")
+    parser.add_argument("--num-archivos", type=int, default=3)
+    parser.add_argument("--bytes-por-archivo", type=int, default=2000)
+    parser.add_argument("--latencia", choices=["fija", "uniforme", "lognormal"], default="lognormal")
+    parser.add_argument("--latencia-ms", type=float, default=200.0)
+    parser.add_argument("--latencia-sigma", type=float, default=0.5)
+    parser.add_argument("--tasa-error", type=float, default=0.0)
+    parser.add_argument("--tasa-vacia", type=float, default=0.0)
+    parser.add_argument("--tasa-truncada", type=float, default=0.0)
+    parser.add_argument("--tasa-malformada", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    # La configuración se carga de forma perezosa: fijar el entorno ANTES de importar la app
+    # La simulación escribe miles de extensiones: sin --database-url no se toca la DB real
+    if not args.database_url:
+        ruta = os.path.join(tempfile.mkdtemp(prefix="ceb_simulacion_"), "sim.db")
+        args.database_url = f"sqlite:///{ruta}"
+    os.environ["DATABASE_URL"] = args.database_url
+    if args.workers:
+        os.environ["GENERATION_WORKERS"] = str(args.workers)
+    print(f"Base de datos de la simulación: {args.database_url}")
+    os.environ.setdefault("SECRET_KEY", "simulacion")
+
+    from .app.core import llm_backend
+    from .app.core.config import get_settings
+    from .app.core.db_setup import SessionLocal, init_db_tables
+    from .app.core.llm_simulator import SimulatedBackend, SimulatorConfig
+    from .app.crud import crud_extension, crud_user
+    from .app.models.extension_models import Extension, ExtensionCreate
+    from .app.models.user_models import SessionCreate
+    from .app.services import extension_service
+    from .app.services.generation_scheduler import PRIORIDADES, scheduler
+
+    mezcla = {}
+    for parte in args.mezcla.split(","):
+        clase, _, peso = parte.partition("=")
+        if clase.strip() not in PRIORIDADES:
+            parser.error(f"Clase de prioridad desconocida en --mezcla: {clase}")
+        mezcla[clase.strip()] = float(peso)
+
+    llm_backend.set_backend(SimulatedBackend(SimulatorConfig(
+        seed=args.seed,
+        replay_path=args.replay,
+        num_archivos=args.num_archivos,
+        bytes_por_archivo=args.bytes_por_archivo,
+        latencia=args.latencia,
+        latencia_media_ms=args.latencia_ms,
+        latencia_sigma=args.latencia_sigma,
+        tasa_error=args.tasa_error,
+        tasa_vacia=args.tasa_vacia,
+        tasa_truncada=args.tasa_truncada,
+        tasa_malformada=args.tasa_malformada,
+    )))
+
+    init_db_tables()
+
+    # Preparación: los usuarios y N extensiones pendientes de generar
+    rng = random.Random(args.seed)
+    db = SessionLocal()
+    try:
+        usuarios = [
+            crud_user.create_initial_user_and_session(db, SessionCreate(nombre_dispositivo=f"simulador {u}"))[0].id_usuario
+            for u in range(max(1, args.usuarios))
+        ]
+        pendientes = []
+        for i in range(args.generaciones):
+            user_id = rng.choice(usuarios)
+            extension = crud_extension.create_extension(
+                db, user_id, ExtensionCreate(nombre=f"Simulada {i}", prompt_original=f"Extensión simulada número {i}")
+            )
+            prioridad = rng.choices(list(mezcla), weights=list(mezcla.values()))[0]
+            pendientes.append((extension.id_extension, user_id, prioridad))
+    finally:
+        db.close()
+
+    # Todas se envían de golpe al planificador, como una ráfaga de solicitudes
+    jobs = [
+        scheduler.submit(extension_id, user_id, prioridad=prioridad, prompt="Extensión simulada")
+        for extension_id, user_id, prioridad in pendientes
+    ]
+    inicio = min(job.enviada_en for job in jobs)
+
+    # Cancelación como la hace el endpoint: marca en la DB y aviso al planificador
+    db = SessionLocal()
+    try:
+        for job in jobs:
+            if rng.random() < args.tasa_cancelacion:
+                crud_extension.update_generated_code_if_pending(db, job.extension_id, extension_service.CANCELLED_CODE)
+                scheduler.cancel(job.extension_id)
+    finally:
+        db.close()
+
+    for job in jobs:
+        job.terminada.wait()
+    duracion = max(job.terminada_en for job in jobs) - inicio
+    scheduler.stop()
+
+    # Latencia desde el envío (espera en cola + ejecución), por clase de prioridad
+    latencias = defaultdict(list)
+    for job in jobs:
+        latencias[job.prioridad].append(job.terminada_en - job.enviada_en)
+    latencias["todas"] = [l for p in PRIORIDADES for l in latencias[p]]
+
+    # Resultados guardados en la DB
+    db = SessionLocal()
+    try:
+        resultados = Counter(
+            _clasificar(codigo)
+            for (codigo,) in db.query(Extension.codigo_generado).filter(Extension.id_extension.in_([job.extension_id for job in jobs]))
+        )
+    finally:
+        db.close()
+
+    print(
+        f"Generaciones: {args.generaciones}  Workers: {get_settings().GENERATION_WORKERS}  "
+        f"Usuarios: {len(usuarios)}"
+    )
+    print(f"Duración total: {duracion:.2f} s  Rendimiento: {args.generaciones / duracion:.1f} generaciones/s")
+    print("Latencia desde el envío (ms):")
+    for clase in (*PRIORIDADES, "todas"):
+        valores = latencias[clase]
+        if not valores:
+            continue
+        print(
+            f"  {clase:<13} n={len(valores):<6} "
+            f"media {statistics.mean(valores) * 1000:.0f}  "
+            f"p50 {_percentil(valores, 50) * 1000:.0f}  "
+            f"p95 {_percentil(valores, 95) * 1000:.0f}  "
+            f"p99 {_percentil(valores, 99) * 1000:.0f}"
+        )
+    print("Resultados:")
+    for motivo, cantidad in resultados.most_common():
+        print(f"  {motivo:<60} {cantidad}")
+
+
+if __name__ == "__main__":
+    main()